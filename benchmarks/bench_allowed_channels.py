@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""허용 채널 확인(is_allowed_channel) 비용을 측정하는 마이크로 벤치마크입니다.
+
+허용 채널이 많을 때(기본 10,000개) 예전 방식(매번 JSON 파일을 읽고 리스트에서 찾기)과
+레지스트리를 사용하는 현재 predicate의 1회 호출 비용을 비교합니다.
+
+    python benchmarks/bench_allowed_channels.py [허용 채널 수] [반복 횟수]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+GUILD_ID = 1
+
+
+def legacy_check(channel_id):
+    """예전 predicate와 동일하게 파일을 읽고 리스트에서 선형 탐색합니다."""
+    allowed_channels = main.load_json(main.ALLOWED_CHANNELS_FILE)
+    return channel_id in allowed_channels
+
+
+async def run(count, iterations):
+    channel_ids = list(range(1_000_000, 1_000_000 + count))
+    # 최악의 경우(리스트의 마지막 원소)와 허용되지 않은 채널을 번갈아 확인합니다.
+    probes = [channel_ids[-1], 42]
+
+    # 예전 형식(정수 리스트)으로 저장해 두고 측정합니다.
+    with open(main.ALLOWED_CHANNELS_FILE, 'w') as f:
+        json.dump(channel_ids, f)
+    start = time.perf_counter()
+    for i in range(iterations):
+        legacy_check(probes[i % 2])
+    legacy = (time.perf_counter() - start) / iterations
+
+    # 현재 형식으로 저장한 뒤 레지스트리를 통해 실제 predicate를 호출합니다.
+    main.save_json([{'channel_id': c, 'guild_id': GUILD_ID} for c in channel_ids], main.ALLOWED_CHANNELS_FILE)
+    main.registry.load()
+    predicate = main.VoiceManagement.createvoice.checks[0]
+
+    async def send_message(*args, **kwargs):
+        pass
+
+    interactions = [
+        SimpleNamespace(channel_id=probe, guild_id=GUILD_ID, response=SimpleNamespace(send_message=send_message))
+        for probe in probes
+    ]
+    start = time.perf_counter()
+    for i in range(iterations):
+        await predicate(interactions[i % 2])
+    current = (time.perf_counter() - start) / iterations
+
+    print(f'허용 채널 수: {count}, 반복: {iterations}')
+    print(f'예전 방식 (파일 읽기 + 리스트 탐색): {legacy * 1e6:10.2f} us/호출')
+    print(f'현재 방식 (레지스트리 집합 조회):    {current * 1e6:10.2f} us/호출')
+    print(f'개선 배율: {legacy / current:.0f}x')
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        asyncio.run(run(count, iterations))
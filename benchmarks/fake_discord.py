@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""부하 테스트용 가짜 디스코드 구현입니다.
+
+실제 토큰이나 네트워크 없이 VoiceManagement를 구동할 수 있도록 봇, 서버, 채널, 멤버, 인터랙션과
+REST 계층을 흉내 냅니다. REST 계층은 라우트별/전역 레이트 리밋과 지연 시간을 시뮬레이션하며,
+호출 수와 레이트 리밋 대기 횟수를 라우트별로 기록합니다.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+
+# 디스코드 스노우플레이크와 비슷한 크기의 ID를 순서대로 발급합니다.
+_ids = itertools.count(1_100_000_000_000_000_000)
+
+
+def next_id():
+    return next(_ids)
+
+
+class RateLimitBucket:
+    """고정 창(window) 방식의 레이트 리밋 버킷입니다."""
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    async def acquire(self, rest, route):
+        while True:
+            now = time.monotonic()
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = now + self.window
+            if self.remaining > 0:
+                self.remaining -= 1
+                return
+            # discord.py와 마찬가지로 리셋 시각까지 기다린 뒤 다시 시도합니다.
+            rest.rate_limited[route] += 1
+            await asyncio.sleep(self.reset_at - now)
+
+
+class FakeRest:
+    """지연 시간과 레이트 리밋을 흉내 내는 REST 계층입니다."""
+    def __init__(self, latency=0.01, jitter=0.005, route_limit=10, route_window=0.1, global_limit=100, global_window=0.1):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_limit = route_limit
+        self.route_window = route_window
+        self.global_bucket = RateLimitBucket(global_limit, global_window)
+        self.buckets = {}
+        self.calls = Counter()  # 라우트별 호출 수
+        self.rate_limited = Counter()  # 라우트별 레이트 리밋 대기 횟수
+
+    async def request(self, route, major=None):
+        """라우트(예: 'DELETE /channels/{id}')와 주요 파라미터(채널/서버 ID)로 버킷을 구분해 요청합니다."""
+        bucket = self.buckets.get((route, major))
+        if bucket is None:
+            bucket = self.buckets[(route, major)] = RateLimitBucket(self.route_limit, self.route_window)
+        await bucket.acquire(self, route)
+        await self.global_bucket.acquire(self, 'global')
+        self.calls[route] += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    async def interaction_callback(self):
+        """인터랙션 응답은 레이트 리밋 없이 지연 시간만 적용합니다."""
+        self.calls['POST /interactions/{id}/callback'] += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+
+class FakeMember:
+    def __init__(self, guild, administrator=False):
+        self.id = next_id()
+        self.guild = guild
+        self.guild_permissions = SimpleNamespace(administrator=administrator)
+        self.mention = f'<@{self.id}>'
+
+    def __str__(self):
+        return f'user{self.id}'
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeRole:
+    """권한 설정(overwrites)의 키로 사용할 수 있는 역할입니다."""
+    def __init__(self, role_id, mention):
+        self.id = role_id
+        self.mention = mention
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeVoiceChannel(discord.VoiceChannel):
+    """isinstance(channel, discord.VoiceChannel) 검사를 통과하는 가짜 음성 채널입니다."""
+    def __init__(self, bot, guild, category, name, overwrites=None):
+        self.bot = bot
+        self.id = next_id()
+        self.name = name
+        self.guild = guild
+        self.category_id = category.id
+        self.overwrites_spec = overwrites
+        self.connected = []  # 현재 접속한 멤버
+
+    @property
+    def members(self):
+        return list(self.connected)
+
+    async def edit(self, *, name=None, user_limit=None, bitrate=None, overwrites=None, reason=None):
+        """이름, 인원 제한, 비트레이트, 권한 설정을 한 번의 요청으로 수정합니다."""
+        await self.bot.rest.request('PATCH /channels/{id}', self.id)
+        if self.guild.channels.get(self.id) is not self:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Channel')
+        if name is not None:
+            self.name = name
+        if overwrites is not None:
+            self.overwrites_spec = overwrites
+
+    async def delete(self, *, reason=None):
+        await self.bot.rest.request('DELETE /channels/{id}', self.id)
+        if self.guild.channels.pop(self.id, None) is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Channel')
+        self.bot.dispatch_channel_delete(self)
+
+
+class FakeCategory:
+    def __init__(self, bot, guild):
+        self.bot = bot
+        self.id = next_id()
+        self.name = f'category-{self.id}'
+        self.guild = guild
+        self.overwrites = {}
+
+    async def create_voice_channel(self, name, user_limit=0, bitrate=64000, overwrites=None, reason=None):
+        await self.bot.rest.request('POST /guilds/{id}/channels', self.guild.id)
+        channel = FakeVoiceChannel(self.bot, self.guild, self, name, overwrites)
+        self.guild.channels[channel.id] = channel
+        return channel
+
+
+class FakeTextChannel:
+    def __init__(self, guild, category):
+        self.id = next_id()
+        self.name = f'text-{self.id}'
+        self.guild = guild
+        self.category = category
+        self.mention = f'<#{self.id}>'
+
+
+class FakeGuild:
+    def __init__(self, bot):
+        self.id = next_id()
+        self.unavailable = False
+        self.shard_id = 0
+        self.channels = {}
+        self.default_role = FakeRole(self.id, '@everyone')
+        self.me = FakeRole(bot.application_id, f'<@{bot.application_id}>')
+        self.category = FakeCategory(bot, self)
+        self.channels[self.category.id] = self.category
+        self.text_channel = FakeTextChannel(self, self.category)
+        self.channels[self.text_channel.id] = self.text_channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    @property
+    def voice_channels(self):
+        return [c for c in self.channels.values() if isinstance(c, FakeVoiceChannel)]
+
+
+class FakeMessage:
+    def __init__(self, bot, channel_id):
+        self.bot = bot
+        self.id = next_id()
+        self.channel = SimpleNamespace(id=channel_id)
+
+    async def edit(self, **kwargs):
+        await self.bot.rest.request('PATCH /channels/{id}/messages/{id}', self.channel.id)
+
+
+class FakePartialMessageable:
+    def __init__(self, bot, channel_id):
+        self.bot = bot
+        self.id = channel_id
+
+    def get_partial_message(self, message_id):
+        message = FakeMessage(self.bot, self.id)
+        message.id = message_id
+        return message
+
+
+class FakeResponse:
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def defer(self, **kwargs):
+        await self.bot.rest.interaction_callback()
+
+    async def send_message(self, *args, **kwargs):
+        await self.bot.rest.interaction_callback()
+
+    async def edit_message(self, **kwargs):
+        await self.bot.rest.interaction_callback()
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        bot = self.interaction.client
+        # 후속 메시지는 인터랙션 토큰마다 별도의 버킷을 사용합니다.
+        await bot.rest.request('POST /webhooks/{id}/{token}', self.interaction.id)
+        return FakeMessage(bot, self.interaction.channel_id)
+
+
+class FakeInteraction:
+    """슬래시 명령어나 버튼 클릭 한 번에 해당하는 인터랙션입니다."""
+    def __init__(self, bot, guild, user, channel=None):
+        self.client = bot
+        self.id = next_id()
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel or guild.text_channel
+        self.channel_id = self.channel.id
+        self.response = FakeResponse(bot)
+        self.followup = FakeFollowup(self)
+        self.extras = {}
+
+
+class FakeBot:
+    """VoiceManagement가 사용하는 commands.Bot의 일부 기능만 제공하는 가짜 봇입니다."""
+    def __init__(self, rest):
+        self.rest = rest
+        self.application_id = next_id()
+        self.guilds = []
+        self.cog = None
+
+    def add_guild(self):
+        guild = FakeGuild(self)
+        self.guilds.append(guild)
+        return guild
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_guild(self, guild_id):
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds:
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                return channel
+        return None
+
+    async def fetch_channel(self, channel_id):
+        await self.rest.request('GET /channels/{id}', channel_id)
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Channel')
+        return channel
+
+    def get_partial_messageable(self, channel_id):
+        return FakePartialMessageable(self, channel_id)
+
+    def dispatch_channel_delete(self, channel):
+        """게이트웨이의 CHANNEL_DELETE 이벤트를 흉내 냅니다."""
+        if self.cog is not None:
+            asyncio.get_running_loop().create_task(self.cog.on_guild_channel_delete(channel))
+
+    async def voice_move(self, member, before, after):
+        """멤버의 음성 채널 이동을 캐시에 반영한 뒤 on_voice_state_update를 호출합니다."""
+        if before is not None:
+            before.connected.remove(member)
+        if after is not None:
+            after.connected.append(member)
+        await self.cog.on_voice_state_update(member, SimpleNamespace(channel=before), SimpleNamespace(channel=after))
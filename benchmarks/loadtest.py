@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""가짜 디스코드(fake_discord.py) 위에서 VoiceManagement를 구동하는 오프라인 부하 테스트입니다.
+
+실제 토큰 없이 수천 건의 /createvoice, 채널 삭제 버튼 클릭, 음성 채널 입장/퇴장 이벤트를 발생시키고
+명령어 지연 시간(p50/p99), 점검(reconcile) 1회 소요 시간, 자동 삭제 대기열 처리 시간,
+작업당 저장소 I/O, 라우트별 REST 호출 수와 레이트 리밋 대기 횟수를 출력합니다.
+시간 단위는 실제 디스코드보다 짧게 축소되어 있으며, 옵션으로 조정할 수 있습니다.
+
+    python benchmarks/loadtest.py --guilds 20 --creates 2000 --events 5000 --deletes 500
+    python benchmarks/loadtest.py --storage sqlite
+"""
+import os
+import sys
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from fake_discord import FakeBot, FakeRest, FakeMember, FakeInteraction  # noqa: E402
+
+
+def percentile(values, pct):
+    """정렬된 값 목록에서 백분위수를 구합니다."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def report_latency(label, values):
+    print(f'{label:<28} {len(values):>7}건  p50 {percentile(values, 50) * 1000:8.2f}ms  '
+          f'p99 {percentile(values, 99) * 1000:8.2f}ms  최대 {max(values, default=0) * 1000:8.2f}ms')
+
+
+class StorageCounter:
+    """저장소의 write 호출을 감싸 횟수, 소요 시간, 기록한 행 수와 바이트 수를 셉니다."""
+    def __init__(self, storage):
+        self.storage = storage
+        self.writes = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._write = storage.write
+        storage.write = self.write
+
+    def write(self, channel_changes, allowed_changes, channels_snapshot, allowed_snapshot):
+        started = time.perf_counter()
+        written = self._write(channel_changes, allowed_changes, channels_snapshot, allowed_snapshot)
+        self.seconds += time.perf_counter() - started
+        self.writes += 1
+        self.rows += len(channel_changes) + len(allowed_changes)
+        self.bytes += written or 0
+        return written
+
+
+async def run_commands(coroutines, concurrency):
+    """코루틴들을 동시 실행 수를 제한하여 실행하고 각각의 소요 시간을 반환합니다."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(coro):
+        async with semaphore:
+            started = time.perf_counter()
+            await coro
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(timed(coro) for coro in coroutines))
+    return latencies
+
+
+async def invoke(command, cog, interaction, **kwargs):
+    """슬래시 명령어의 검사(check)와 본문을 실제 디스코드와 같은 순서로 실행합니다."""
+    for check in command.checks:
+        if not await check(interaction):
+            return
+    await command.callback(cog, interaction, **kwargs)
+
+
+async def run(args):
+    random.seed(args.seed)
+    if not args.verbose:
+        # 봇의 작업별 로그(채널 생성/삭제)는 결과 출력과 섞이지 않도록 숨깁니다.
+        main.print = lambda *a, **k: None
+    main.STORAGE_BACKEND = args.storage
+    main.WARM_POOL_SIZE = args.pool
+    if not args.quota:
+        # 기본적으로는 봇 자체의 처리량을 측정하도록 /createvoice 요청 제한을 끕니다.
+        main.MAX_CHANNELS_PER_CREATOR = math.inf
+        main.create_user_limiter = main.TokenBucketLimiter(math.inf, 1)
+        main.create_guild_limiter = main.TokenBucketLimiter(math.inf, 1)
+    main.registry.load()
+    main.registry.flush_delay = args.flush_delay
+    storage = StorageCounter(main.registry.storage)
+    operations = 0
+
+    rest = FakeRest(latency=args.latency, jitter=args.latency / 2, route_limit=args.route_limit,
+                    route_window=args.window, global_limit=args.global_limit, global_window=args.window)
+    bot = FakeBot(rest)
+    guilds = [bot.add_guild() for _ in range(args.guilds)]
+    users = {guild.id: [FakeMember(guild) for _ in range(args.users)] for guild in guilds}
+    admins = {guild.id: FakeMember(guild, administrator=True) for guild in guilds}
+    for guild in guilds:
+        main.registry.add_allowed(guild.text_channel.id, guild.id)
+
+    # 부하 테스트 중에는 자동 삭제가 일어나지 않도록 충분히 긴 시간을 사용합니다.
+    main.EMPTY_CHANNEL_TIMEOUT = timedelta(hours=1)
+    cog = main.VoiceManagement(bot)
+    cog.check_empty_channels.cancel()  # 점검은 아래에서 직접 실행합니다.
+    bot.cog = cog
+    await cog.cog_load()
+
+    print(f'저장소: {args.storage}, 서버 {args.guilds}개, 사용자 {args.users * args.guilds}명, REST 지연 {args.latency * 1000:.1f}ms')
+    print()
+
+    # 0. 대기 채널 풀 채우기 (--pool을 지정한 경우)
+    if args.pool:
+        started = time.perf_counter()
+        await main.VoiceManagement.check_empty_channels.coro(cog)
+        await asyncio.gather(*cog.pool_refills.values())
+        print(f'{"대기 채널 풀 채우기":<28} {main.registry.pooled_count():>7}개  {time.perf_counter() - started:.2f}초')
+
+    # 1. /createvoice
+    started = time.perf_counter()
+    create_latencies = await run_commands(
+        (invoke(main.VoiceManagement.createvoice, cog,
+                FakeInteraction(bot, guild, random.choice(users[guild.id])),
+                name=f'voice-{i}', limit=random.choice((0, 5, 10)), bitrate=64)
+         for i, guild in ((i, random.choice(guilds)) for i in range(args.creates))),
+        args.concurrency)
+    create_elapsed = time.perf_counter() - started
+    operations += args.creates
+    report_latency('/createvoice', create_latencies)
+    print(f'{"":<28} 처리량 {args.creates / create_elapsed:8.1f}건/초')
+    rejected = {key[0]: int(count) for key, count in main.CREATE_REJECTED.values.items()}
+    if rejected:
+        print(f'{"":<28} 제한으로 거절 {sum(rejected.values())}건 {rejected}')
+    if args.pool:
+        pool_events = {key[0]: int(count) for key, count in main.POOL_EVENTS.values.items()}
+        print(f'{"":<28} 대기 채널 사용 {pool_events.get("taken", 0)}건, 부족 {pool_events.get("miss", 0)}건')
+
+    # 대기 채널 풀은 다음 단계들의 측정과 섞이지 않도록 채워질 때까지 기다립니다.
+    await asyncio.gather(*cog.pool_refills.values())
+
+    # 2. 음성 채널 입장/퇴장 이벤트
+    channel_ids = [channel_id for channel_id, record in main.registry.channels.items() if not record.get('pooled')]
+    event_latencies = []
+    for _ in range(args.events // 2):
+        channel = bot.get_channel(random.choice(channel_ids))
+        member = random.choice(users[channel.guild.id])
+        for before, after in ((None, channel), (channel, None)):
+            started = time.perf_counter()
+            await bot.voice_move(member, before, after)
+            event_latencies.append(time.perf_counter() - started)
+    operations += len(event_latencies)
+    report_latency('입장/퇴장 이벤트 처리', event_latencies)
+
+    # 3. 채널 삭제 버튼 → 확인 버튼
+    async def delete_flow(channel_id):
+        guild = bot.get_channel(channel_id).guild
+        creator = main.registry.get_channel(channel_id).get('creator_id')
+        user = next((u for u in users[guild.id] if u.id == creator), admins[guild.id])
+        await main.DeleteChannelButton(channel_id).callback(FakeInteraction(bot, guild, user))
+        await main.ConfirmDeleteButton(channel_id).callback(FakeInteraction(bot, guild, user))
+
+    to_delete = random.sample(channel_ids, min(args.deletes, len(channel_ids)))
+    delete_latencies = await run_commands((delete_flow(channel_id) for channel_id in to_delete), args.concurrency)
+    operations += len(to_delete)
+    report_latency('삭제 버튼 + 확인', delete_latencies)
+
+    # 4. 점검(reconcile) 1회 소요 시간
+    tick_latencies = []
+    for _ in range(args.ticks):
+        started = time.perf_counter()
+        await main.VoiceManagement.check_empty_channels.coro(cog)
+        tick_latencies.append(time.perf_counter() - started)
+    report_latency(f'점검 1회 ({len(main.registry.channels)}개 채널)', tick_latencies)
+    await asyncio.gather(*cog.pool_refills.values())
+
+    # 5. 남은 채널이 한꺼번에 만료되었을 때 자동 삭제 대기열 처리
+    main.EMPTY_CHANNEL_TIMEOUT = timedelta(0)
+    remaining = [channel_id for channel_id, record in main.registry.channels.items() if not record.get('pooled')]
+    for channel_id in remaining:
+        cog.cancel_reap(channel_id)
+        cog.schedule_reap(channel_id)
+    while cog.reap_pending or cog.reap_timers:
+        await asyncio.sleep(0.01)
+    operations += len(remaining)
+    stats = cog.reap_stats
+    print(f'{"자동 삭제 대기열":<28} {stats["last_drain_size"]:>7}건  최대 대기 {stats["max_backlog"]}건  '
+          f'처리 시간 {stats["last_drain_seconds"]:.2f}초')
+    if args.pool:
+        print(f'{"":<28} 대기 채널로 반환 {int(main.POOL_EVENTS.values.get(("recycled",), 0))}건')
+
+    await cog.cog_unload()
+
+    print()
+    print(f'저장소 쓰기: {storage.writes}회, {storage.rows}행, {storage.seconds * 1000:.1f}ms, {storage.bytes / 1024:.1f}KiB')
+    print(f'작업당 저장소 I/O: 쓰기 {storage.writes / operations:.4f}회, '
+          f'{storage.seconds / operations * 1e6:.1f}us, {storage.bytes / operations:.1f}B (작업 {operations}건 기준)')
+    print()
+    print('REST 호출 (라우트별 호출 수 / 레이트 리밋 대기)')
+    for route, count in sorted(rest.calls.items()):
+        print(f'  {route:<40} {count:>7} / {rest.rate_limited[route]}')
+    print(f'  {"전역 레이트 리밋 대기":<40} {rest.rate_limited["global"]:>7}')
+
+    if args.metrics:
+        print()
+        print(main.render_metrics(), end='')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='가짜 디스코드 위에서 VoiceManagement 부하 테스트를 실행합니다.')
+    parser.add_argument('--storage', choices=('json', 'sqlite'), default='json', help='저장소 종류')
+    parser.add_argument('--guilds', type=int, default=20, help='서버 수')
+    parser.add_argument('--users', type=int, default=50, help='서버당 사용자 수')
+    parser.add_argument('--creates', type=int, default=2000, help='/createvoice 실행 횟수')
+    parser.add_argument('--events', type=int, default=5000, help='입장/퇴장 이벤트 수')
+    parser.add_argument('--deletes', type=int, default=500, help='삭제 버튼 클릭 수')
+    parser.add_argument('--ticks', type=int, default=5, help='점검 실행 횟수')
+    parser.add_argument('--concurrency', type=int, default=100, help='동시에 처리 중인 명령어 수')
+    parser.add_argument('--latency', type=float, default=0.005, help='REST 요청 1회 지연 시간(초)')
+    parser.add_argument('--route-limit', type=int, default=10, help='라우트 버킷당 창(window)마다 허용되는 요청 수')
+    parser.add_argument('--global-limit', type=int, default=100, help='창(window)마다 허용되는 전체 요청 수')
+    parser.add_argument('--window', type=float, default=0.1, help='레이트 리밋 창 길이(초)')
+    parser.add_argument('--flush-delay', type=float, default=0.2, help='레지스트리 지연 저장 간격(초)')
+    parser.add_argument('--pool', type=int, default=0, help='카테고리마다 미리 만들어 둘 대기 채널 수 (WARM_POOL_SIZE)')
+    parser.add_argument('--quota', action='store_true', help='/createvoice 사용자/서버별 요청 제한과 채널 수 제한을 적용')
+    parser.add_argument('--seed', type=int, default=0, help='난수 시드')
+    parser.add_argument('--verbose', action='store_true', help='봇의 작업별 로그도 출력')
+    parser.add_argument('--metrics', action='store_true', help='실행 후 /metrics 엔드포인트와 같은 내용을 출력')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        asyncio.run(run(arguments))
@@ -2,9 +2,20 @@
 
 # 필요한 라이브러리들을 임포트합니다.
 import os
+import re
 import json
+import hashlib
+import functools
+import math
+import asyncio
+import time
+import sqlite3
+import signal
+import threading
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import aiohttp
+from aiohttp import web
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands, ui, ButtonStyle, Embed
@@ -28,19 +39,324 @@ intents = discord.Intents.default()
 intents.guilds = True
 intents.voice_states = True
 
+# 샤딩 설정 (선택사항)
+# SHARD_COUNT: 전체 샤드 수 ('auto'이면 디스코드가 권장하는 수를 사용합니다)
+# SHARD_IDS: 이 프로세스가 담당할 샤드 번호 (쉼표로 구분, 여러 프로세스로 나누어 실행할 때 사용)
+SHARD_COUNT_STR = os.getenv('SHARD_COUNT')
+SHARD_IDS_STR = os.getenv('SHARD_IDS')
+SHARD_COUNT = int(SHARD_COUNT_STR) if SHARD_COUNT_STR and SHARD_COUNT_STR != 'auto' else None
+SHARD_IDS = [int(shard_id.strip()) for shard_id in SHARD_IDS_STR.split(',')] if SHARD_IDS_STR else None
+
+# 슬래시 명령어 동기화 설정 (선택사항)
+# SYNC_GUILD_ID: 지정하면 명령어를 전역이 아닌 이 서버에만 동기화합니다. 전역 동기화보다 바로 반영되므로 테스트할 때 사용합니다.
+SYNC_GUILD_ID = int(os.getenv('SYNC_GUILD_ID')) if os.getenv('SYNC_GUILD_ID') else None
+# 마지막으로 동기화한 명령어 구성의 해시를 저장하는 파일입니다. 해시가 같으면 동기화를 건너뜁니다.
+COMMAND_SYNC_FILE = 'command_sync.json'
+
+# --- 메트릭 (Prometheus 형식) ---
+
+# 메트릭 HTTP 엔드포인트 설정 (METRICS_PORT를 지정하지 않으면 서버를 띄우지 않습니다)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+
+# 지연 시간 히스토그램의 기본 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS = []  # 등록된 모든 메트릭
+
+class Metric:
+    """이름, 설명, 레이블을 가진 메트릭의 기본 클래스입니다."""
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # 레이블 값 튜플 -> 값
+        METRICS.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @staticmethod
+    def _format_labels(names, values, extra=()):
+        pairs = [f'{name}="{value}"' for name, value in zip(names, values)] + list(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def samples(self):
+        """(접미사, 레이블 문자열, 값) 목록을 반환합니다."""
+        return [('', self._format_labels(self.labelnames, key), value) for key, value in self.values.items()]
+
+    @staticmethod
+    def _format_value(value):
+        """값을 Prometheus 텍스트 형식으로 변환합니다. (NaN, 무한대 표기 포함)"""
+        value = float(value)
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(f'{self.name}{suffix}{labels} {self._format_value(value)}' for suffix, labels, value in self.samples())
+        return lines
+
+class Counter(Metric):
+    """증가만 하는 카운터입니다."""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """현재 값을 나타내는 게이지입니다. 함수를 지정하면 수집할 때마다 값을 계산합니다."""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = None
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """수집 시 호출되어 (레이블 딕셔너리, 값) 목록을 반환하는 함수를 지정합니다."""
+        self.function = function
+
+    def samples(self):
+        if self.function is not None:
+            self.values = {self._key(labels): value for labels, value in self.function()}
+        return super().samples()
+
+class Histogram(Metric):
+    """구간별 관측 횟수와 합계를 기록하는 히스토그램입니다."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state['counts'][i] += 1
+        state['sum'] += value
+        state['count'] += 1
+
+    def samples(self):
+        samples = []
+        for key, state in self.values.items():
+            for bound, count in zip(self.buckets, state['counts']):
+                samples.append(('_bucket', self._format_labels(self.labelnames, key, [f'le="{bound}"']), count))
+            samples.append(('_bucket', self._format_labels(self.labelnames, key, ['le="+Inf"']), state['count']))
+            samples.append(('_sum', self._format_labels(self.labelnames, key), state['sum']))
+            samples.append(('_count', self._format_labels(self.labelnames, key), state['count']))
+        return samples
+
+def render_metrics():
+    """모든 메트릭을 Prometheus 텍스트 형식으로 변환합니다."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+COMMAND_SECONDS = Histogram('voicebot_command_seconds', '슬래시 명령어 처리 시간', ('command',))
+COMMANDS_TOTAL = Counter('voicebot_commands_total', '슬래시 명령어 실행 횟수', ('command', 'status'))
+CREATE_STAGE_SECONDS = Histogram('voicebot_create_stage_seconds', '/createvoice 단계별 소요 시간', ('stage',))
+STORAGE_SECONDS = Histogram('voicebot_storage_seconds', '저장소 읽기/쓰기 소요 시간', ('operation',))
+STORAGE_BYTES = Counter('voicebot_storage_bytes_total', '저장소에서 읽거나 저장소에 기록한 바이트 수', ('operation',))
+STORAGE_ROWS = Counter('voicebot_storage_rows_total', '저장소에서 읽은 항목 수 또는 기록한 변경 항목 수', ('operation',))
+RECONCILE_SECONDS = Histogram('voicebot_reconcile_seconds', '채널 상태 점검 1회 소요 시간')
+CHANNELS_TRACKED = Gauge('voicebot_channels_tracked', '관리 중인 음성 채널 수')
+CHANNELS_EMPTY = Gauge('voicebot_channels_empty', '비어있어 자동 삭제를 기다리는 채널 수')
+CHANNELS_DELETED = Counter('voicebot_channels_deleted_total', '삭제된 채널 수', ('reason',))
+REAP_BACKLOG = Gauge('voicebot_reap_backlog', '자동 삭제 대기열에 남은 채널 수')
+REAP_DRAIN_SECONDS = Histogram('voicebot_reap_drain_seconds', '자동 삭제 대기열을 비우는 데 걸린 시간')
+REST_REQUESTS = Counter('voicebot_rest_requests_total', 'REST API 요청 수', ('route', 'status'))
+REST_RATE_LIMITED = Counter('voicebot_rest_rate_limited_total', 'REST API 429 응답 수', ('route',))
+CREATE_REJECTED = Counter('voicebot_create_rejected_total', '제한에 걸려 거절된 /createvoice 요청 수', ('reason',))
+POOL_CHANNELS = Gauge('voicebot_pool_channels', '숨겨 둔 대기 채널 수')
+POOL_EVENTS = Counter('voicebot_pool_events_total', '대기 채널 풀 이벤트 수 (created, taken, miss, recycled, trimmed)', ('event',))
+GATEWAY_LATENCY = Gauge('voicebot_gateway_latency_seconds', '게이트웨이 하트비트 지연 시간', ('shard',))
+STARTUP_SECONDS = Gauge('voicebot_startup_seconds', '프로세스 시작부터 각 시작 단계를 마칠 때까지 걸린 시간', ('stage',))
+
+# --- 시작 시간 측정 ---
+
+STARTED_AT = time.perf_counter()  # 라이브러리를 불러온 직후의 시각 (시작 단계별 시간의 기준)
+# 시작 단계 -> 로그에 표시할 이름 (진행 순서대로)
+STARTUP_STAGES = {
+    'storage': '저장소 로드',
+    'setup': 'Cog 등록',
+    'login': '로그인',
+    'ready': '게이트웨이 준비',
+    'commands': '명령어 동기화',
+    'first_command': '첫 명령어 처리',
+}
+startup_times = {}  # 시작 단계 -> 프로세스 시작부터 걸린 시간(초)
+
+def mark_startup(stage):
+    """시작 단계를 처음 마친 시각을 기록합니다. 처음이면 True, 재연결 등으로 다시 호출된 경우 False를 반환합니다."""
+    if stage in startup_times:
+        return False
+    startup_times[stage] = time.perf_counter() - STARTED_AT
+    STARTUP_SECONDS.set(startup_times[stage], stage=stage)
+    return True
+
+def startup_report():
+    """지금까지 마친 시작 단계별 시간을 한 줄로 만듭니다."""
+    return ', '.join(f'{name} {startup_times[stage]:.2f}초' for stage, name in STARTUP_STAGES.items() if stage in startup_times)
+
+def rest_route(method, path):
+    """요청 경로의 ID를 {id}로, 인터랙션/웹훅 토큰을 {token}으로 바꿔 라우트 이름을 만듭니다.
+
+    예: DELETE /api/v10/channels/{id}, POST /api/v10/webhooks/{id}/{token}
+    토큰은 요청마다 달라 레이블 수가 끝없이 늘어나고, 노출되면 안 되는 값이므로 반드시 지웁니다.
+    """
+    path = re.sub(r'/[0-9]{15,}', '/{id}', path)
+    path = re.sub(r'/(interactions|webhooks)/\{id\}/[^/]+', r'/\1/{id}/{token}', path)
+    return f"{method} {path}"
+
+async def on_rest_request_end(session, context, params):
+    """aiohttp 요청이 끝날 때마다 라우트별 요청 수와 429 응답 수를 기록합니다."""
+    route = rest_route(params.method, params.url.path)
+    REST_REQUESTS.inc(route=route, status=params.response.status)
+    if params.response.status == 429:
+        REST_RATE_LIMITED.inc(route=route)
+
+# discord.py의 HTTP 세션에 연결하여 모든 REST 요청을 관찰합니다.
+http_trace = aiohttp.TraceConfig()
+http_trace.on_request_end.append(on_rest_request_end)
+
+def set_command_status(interaction, status):
+    """명령어가 예외 없이 끝나더라도 실패('error')나 거절('rejected')로 기록되도록 결과를 지정합니다."""
+    interaction.extras['command_status'] = status
+
+def instrumented(func):
+    """슬래시 명령어의 처리 시간과 결과(ok, rejected, error)별 횟수를 기록하는 데코레이터입니다.
+
+    명령어 안에서 오류를 사용자에게 안내하고 끝내는 경우에는 set_command_status()로 지정한 결과를 사용합니다.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, interaction, *args, **kwargs):
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            result = await func(self, interaction, *args, **kwargs)
+            status = interaction.extras.get('command_status', status)
+            return result
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            COMMAND_SECONDS.observe(time.perf_counter() - started, command=func.__name__)
+            COMMANDS_TOTAL.inc(command=func.__name__, status=status)
+            if mark_startup('first_command'):
+                print(f'시작 후 첫 명령어 처리 완료: {startup_report()}')
+    return wrapper
+
+async def start_metrics_server(host, port):
+    """메트릭을 /metrics 경로로 제공하는 HTTP 서버를 시작하고 runner를 반환합니다."""
+    async def handle_metrics(request):
+        return web.Response(text=render_metrics(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f'메트릭 서버 시작: http://{host}:{port}/metrics')
+    return runner
+
+# --- 봇 생성 ---
+
 # 봇의 기본 설정을 구성합니다. 명령어 접두사는 '!'로 설정합니다.
-bot = commands.Bot(command_prefix='!', intents=intents)
+if SHARD_COUNT_STR or SHARD_IDS:
+    # 서버 수가 많으면 샤드로 나누어 게이트웨이 연결을 분산합니다.
+    bot = commands.AutoShardedBot(command_prefix='!', intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, http_trace=http_trace)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, http_trace=http_trace)
+
+def gateway_latencies():
+    """샤드별 게이트웨이 지연 시간을 반환합니다."""
+    if isinstance(bot, commands.AutoShardedBot):
+        return [({'shard': shard_id}, latency) for shard_id, latency in bot.latencies]
+    return [({'shard': 0}, bot.latency)]
+
+GATEWAY_LATENCY.set_function(gateway_latencies)
+
+def shard_id_for(guild_id, shard_count):
+    """서버가 속한 샤드 번호를 반환합니다. (디스코드 샤딩 공식)"""
+    return (guild_id >> 22) % shard_count
+
+def owns_guild(guild_id):
+    """이 프로세스가 담당하는 샤드의 서버인지 확인합니다.
+
+    서버 정보가 없는 예전 기록은 어느 샤드의 것인지 알 수 없으므로 모든 샤드가 읽고,
+    점검 작업에서 서버를 확인한 뒤 담당 샤드만 남깁니다.
+    """
+    if SHARD_IDS is None or guild_id is None:
+        return True
+    return shard_id_for(guild_id, SHARD_COUNT) in SHARD_IDS
 
 # --- 이벤트 핸들러 ---
 
+@bot.event
+async def setup_hook():
+    """로그인 직후, 게이트웨이에 연결하기 전에 한 번만 실행됩니다."""
+    mark_startup('login')
+    # 명령어 동기화는 게이트웨이 연결을 늦추지 않도록 백그라운드에서 실행합니다.
+    global command_sync_task
+    command_sync_task = asyncio.create_task(sync_commands())
+
 @bot.event
 async def on_ready():
-    """봇이 성공적으로 디스코드에 로그인했을 때 실행되는 이벤트입니다."""
+    """봇이 성공적으로 디스코드에 로그인했을 때 실행되는 이벤트입니다. 재연결할 때도 다시 실행됩니다."""
     print(f'Logged in as {bot.user} (ID: {bot.user.id})')
+    if mark_startup('ready'):
+        print(f'시작 시간: {startup_report()}')
+
+# --- 슬래시 명령어 동기화 ---
+
+command_sync_task = None  # setup_hook에서 시작한 명령어 동기화 작업
+
+def command_signature(payload):
+    """명령어 구성(이름, 설명, 옵션, 권한 등)의 해시를 만듭니다."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+async def sync_commands():
+    """명령어 구성이 마지막으로 동기화했을 때와 다른 경우에만 디스코드에 동기화합니다.
+
+    동기화는 레이트 리밋이 엄격하므로 재시작할 때마다 하지 않고, 해시를 파일에 저장해 두고 비교합니다.
+    SYNC_GUILD_ID가 지정되면 그 서버에만 동기화합니다.
+    """
+    started = time.perf_counter()
+    if SHARD_IDS is not None and 0 not in SHARD_IDS:
+        # 여러 프로세스로 나누어 실행할 때는 0번 샤드를 담당하는 프로세스만 동기화합니다.
+        return
+    guild = discord.Object(id=SYNC_GUILD_ID) if SYNC_GUILD_ID else None
+    if guild is not None:
+        bot.tree.copy_global_to(guild=guild)
+    scope = f"{bot.application_id}:{SYNC_GUILD_ID or 'global'}"
+    signature = command_signature([command.to_dict(bot.tree) for command in bot.tree.get_commands(guild=guild)])
+
+    state = load_json(COMMAND_SYNC_FILE)
+    if not isinstance(state, dict):
+        state = {}
     try:
-        # 슬래시 커맨드를 서버와 동기화합니다.
-        synced = await bot.tree.sync()
-        print(f'Synced {len(synced)} commands.')
+        if state.get(scope) == signature:
+            print(f'명령어 구성이 바뀌지 않아 동기화를 건너뜁니다. ({scope})')
+        else:
+            synced = await bot.tree.sync(guild=guild)
+            state[scope] = signature
+            await asyncio.to_thread(save_json, state, COMMAND_SYNC_FILE)
+            print(f'Synced {len(synced)} commands. ({scope}, {time.perf_counter() - started:.2f}초)')
+        mark_startup('commands')
     except Exception as e:
         print(f'Error syncing commands: {e}')
 
@@ -53,10 +369,8 @@ ALLOWED_CHANNELS_FILE = 'allowed_channels.json'
 
 def load_json(filename):
     """지정된 JSON 파일을 읽어 데이터를 반환합니다."""
-    # 파일이 없으면 빈 리스트를 담은 새 파일을 생성합니다.
+    # 파일이 없으면 빈 리스트를 반환합니다. 파일은 처음 저장할 때 만들어집니다.
     if not os.path.exists(filename):
-        with open(filename, 'w') as f:
-            json.dump([], f)
         return []
     try:
         # 파일이 존재하면 데이터를 읽어 반환합니다.
@@ -64,84 +378,778 @@ def load_json(filename):
             return json.load(f)
     except json.JSONDecodeError:
         # 파일 내용이 비어있거나 JSON 형식이 아닐 경우 빈 리스트를 반환합니다.
+        # 손상된 파일은 덮어쓰기 전에 따로 보관하여 수동으로 복구할 수 있도록 합니다.
+        if os.path.getsize(filename) > 0:
+            backup = f'{filename}.corrupt-{datetime.now().strftime("%Y%m%d%H%M%S")}'
+            os.replace(filename, backup)
+            print(f'{filename} 파일이 손상되어 {backup}(으)로 옮겼습니다.')
         return []
 
 def save_json(data, filename):
-    """주어진 데이터를 지정된 JSON 파일에 저장합니다."""
-    with open(filename, 'w') as f:
+    """주어진 데이터를 지정된 JSON 파일에 원자적으로 저장합니다."""
+    # 임시 파일에 먼저 기록한 뒤 교체하여, 쓰기 도중 중단되어도 기존 파일이 손상되지 않도록 합니다.
+    tmp_filename = f'{filename}.tmp'
+    with open(tmp_filename, 'w') as f:
         # indent=4 옵션으로 가독성 좋게 저장합니다.
         json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+def file_mtime(filename):
+    """파일의 마지막 수정 시각(ns)을 반환합니다. 파일이 없으면 None을 반환합니다."""
+    try:
+        return os.stat(filename).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def entry_guild_id(entry):
+    """저장된 항목의 서버 ID를 반환합니다. 예전 형식(정수)이거나 서버 정보가 없으면 None을 반환합니다."""
+    if isinstance(entry, int):
+        return None
+    return entry.get('guild_id')
+
+# --- 저장소 백엔드 ---
+
+# 사용할 저장소 종류('json' 또는 'sqlite')와 SQLite 데이터베이스 파일 이름
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json').lower()
+STORAGE_DB_FILE = os.getenv('STORAGE_DB_FILE', 'voicebot.db')
+
+class JsonStorage:
+    """기존과 같이 JSON 파일 두 개에 전체 내용을 저장하는 저장소입니다."""
+    full_snapshot = True  # 변경된 항목만이 아니라 전체 내용을 받아 저장합니다.
+
+    def __init__(self, channels_file, allowed_file, seed_channels_file=None, seed_allowed_file=None):
+        self.channels_file = channels_file
+        self.allowed_file = allowed_file
+        # 샤드별 파일이 아직 없을 때 담당 서버의 데이터를 가져올 기존(전체) 파일
+        self.seed_channels_file = seed_channels_file
+        self.seed_allowed_file = seed_allowed_file
+
+    def _load(self, filename, seed_filename):
+        """파일을 읽습니다. 샤드별 파일이 없으면 기존 파일에서 담당 서버의 데이터만 가져옵니다."""
+        if seed_filename and not os.path.exists(filename) and os.path.exists(seed_filename):
+            data = [entry for entry in load_json(seed_filename) if owns_guild(entry_guild_id(entry))]
+            save_json(data, filename)
+            return data
+        return load_json(filename)
+
+    def load_channels(self):
+        """생성된 음성 채널 기록 목록을 반환합니다."""
+        return self._load(self.channels_file, self.seed_channels_file)
+
+    def load_allowed(self):
+        """허용 채널 목록을 반환합니다."""
+        return self._load(self.allowed_file, self.seed_allowed_file)
+
+    def allowed_version(self):
+        """허용 채널 데이터가 외부에서 바뀌었는지 판단하기 위한 값(파일 수정 시각)을 반환합니다."""
+        return file_mtime(self.allowed_file)
+
+    def loaded_bytes(self):
+        """읽어 온 파일들의 크기(바이트)를 반환합니다."""
+        return sum(os.path.getsize(filename) for filename in (self.channels_file, self.allowed_file)
+                   if os.path.exists(filename))
+
+    def write(self, channel_changes, allowed_changes, channels_snapshot, allowed_snapshot):
+        """변경이 있는 파일만 전체 내용으로 다시 쓰고, 기록한 바이트 수를 반환합니다."""
+        written = 0
+        if channel_changes:
+            save_json(channels_snapshot, self.channels_file)
+            written += os.path.getsize(self.channels_file)
+        if allowed_changes:
+            save_json(allowed_snapshot, self.allowed_file)
+            written += os.path.getsize(self.allowed_file)
+        return written
+
+    def close(self):
+        pass
+
+class SqliteStorage:
+    """SQLite(WAL 모드)에 채널 단위로 저장하는 저장소입니다. 변경된 행만 기록하므로 전체 파일을 다시 쓰지 않습니다."""
+    full_snapshot = False
+
+    def __init__(self, db_file, channels_file=None, allowed_file=None):
+        self.db_file = db_file
+        # 작업자 스레드에서 사용하므로 같은 스레드 검사를 끄고, 잠금으로 접근을 직렬화합니다.
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS created_channels (
+                    channel_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER,
+                    data TEXT NOT NULL
+                )''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_created_channels_guild ON created_channels (guild_id)')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS allowed_channels (
+                    channel_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER
+                )''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_allowed_channels_guild ON allowed_channels (guild_id)')
+        self.migrate_from_json(channels_file, allowed_file)
+
+    def migrate_from_json(self, channels_file, allowed_file):
+        """기존 JSON 파일이 남아있으면 데이터베이스로 옮기고, 옮긴 파일의 이름을 바꿔둡니다."""
+        for filename, is_channels in ((channels_file, True), (allowed_file, False)):
+            if not filename or not os.path.exists(filename):
+                continue
+            data = load_json(filename)
+            if is_channels:
+                changes = {d['channel_id']: d for d in data if d.get('channel_id')}
+                self.write(changes, {}, None, None)
+            else:
+                changes = {}
+                for entry in data:
+                    if isinstance(entry, int):
+                        changes[entry] = (None, True)
+                    else:
+                        changes[entry['channel_id']] = (entry.get('guild_id'), True)
+                self.write({}, changes, None, None)
+            try:
+                os.replace(filename, f'{filename}.migrated')
+            except FileNotFoundError:
+                # 다른 샤드 프로세스가 먼저 옮긴 경우입니다.
+                continue
+            print(f'{filename}의 데이터 {len(data)}건을 {self.db_file}(으)로 옮겼습니다.')
+
+    def _shard_filter(self):
+        """이 프로세스가 담당하는 샤드의 행만 읽도록 WHERE 절과 인자를 만듭니다."""
+        if SHARD_IDS is None:
+            return '', ()
+        placeholders = ', '.join('?' * len(SHARD_IDS))
+        # 서버 정보가 없는 예전 행은 모든 샤드가 읽습니다. (owns_guild 참고)
+        clause = f' WHERE ((guild_id >> 22) % ?) IN ({placeholders}) OR guild_id IS NULL'
+        return clause, (SHARD_COUNT, *SHARD_IDS)
+
+    def load_channels(self):
+        clause, params = self._shard_filter()
+        with self.lock:
+            rows = self.conn.execute(f'SELECT data FROM created_channels{clause} ORDER BY channel_id', params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def load_allowed(self):
+        clause, params = self._shard_filter()
+        with self.lock:
+            rows = self.conn.execute(f'SELECT channel_id, guild_id FROM allowed_channels{clause}', params).fetchall()
+        return [{'channel_id': channel_id, 'guild_id': guild_id} for channel_id, guild_id in rows]
+
+    def allowed_version(self):
+        """다른 연결이 데이터베이스를 수정하면 바뀌는 data_version 값을 반환합니다."""
+        with self.lock:
+            return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def loaded_bytes(self):
+        """이 프로세스가 읽는 채널 기록 데이터의 크기(바이트)를 반환합니다. 허용 채널 행은 ID뿐이므로 제외합니다."""
+        clause, params = self._shard_filter()
+        with self.lock:
+            return self.conn.execute(f'SELECT COALESCE(SUM(LENGTH(data)), 0) FROM created_channels{clause}', params).fetchone()[0]
+
+    def write(self, channel_changes, allowed_changes, channels_snapshot, allowed_snapshot):
+        """변경된 행만 하나의 트랜잭션으로 추가/수정/삭제하고, 기록한 데이터의 바이트 수를 반환합니다."""
+        written = 0
+        with self.lock, self.conn:
+            for channel_id, record in channel_changes.items():
+                if record is None:
+                    self.conn.execute('DELETE FROM created_channels WHERE channel_id = ?', (channel_id,))
+                else:
+                    data = json.dumps(record)
+                    written += len(data)
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO created_channels (channel_id, guild_id, data) VALUES (?, ?, ?)',
+                        (channel_id, record.get('guild_id'), data))
+            for channel_id, (guild_id, present) in allowed_changes.items():
+                if present:
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO allowed_channels (channel_id, guild_id) VALUES (?, ?)',
+                        (channel_id, guild_id))
+                else:
+                    self.conn.execute('DELETE FROM allowed_channels WHERE channel_id = ?', (channel_id,))
+        return written
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def shard_filename(filename, shard_ids):
+    """샤드별 JSON 파일 이름을 만듭니다. 예: created_channels.shard-0-1.json"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}.shard-{'-'.join(str(shard_id) for shard_id in shard_ids)}{ext}"
+
+def create_storage():
+    """환경 변수 STORAGE_BACKEND에 따라 저장소를 생성합니다."""
+    if STORAGE_BACKEND == 'sqlite':
+        # 행 단위로 기록하므로 여러 샤드 프로세스가 같은 데이터베이스를 함께 사용할 수 있습니다.
+        return SqliteStorage(STORAGE_DB_FILE, CHANNELS_FILE, ALLOWED_CHANNELS_FILE)
+    if SHARD_IDS is not None:
+        # JSON은 파일 전체를 다시 쓰므로, 샤드 프로세스마다 별도의 파일을 사용합니다.
+        return JsonStorage(shard_filename(CHANNELS_FILE, SHARD_IDS), shard_filename(ALLOWED_CHANNELS_FILE, SHARD_IDS),
+                           CHANNELS_FILE, ALLOWED_CHANNELS_FILE)
+    return JsonStorage(CHANNELS_FILE, ALLOWED_CHANNELS_FILE)
+
+# --- 채널 레지스트리 (메모리 캐시 + 지연 저장) ---
+
+class ChannelRegistry:
+    """생성된 음성 채널과 허용된 텍스트 채널 정보를 메모리에 보관하고, 변경 사항을 모아서 저장소에 기록하는 클래스입니다."""
+    def __init__(self, storage=None, flush_delay=2.0, recheck_interval=5.0):
+        self.storage = storage  # 실제 저장을 담당하는 저장소 (load() 전에 지정하지 않으면 환경 변수에 따라 생성)
+        self.flush_delay = flush_delay  # 마지막 변경 후 저장하기까지 기다리는 시간(초)
+        self.recheck_interval = recheck_interval  # 허용 채널 데이터의 외부 변경을 확인하는 최소 간격(초)
+        self.channels = {}  # channel_id -> 생성된 음성 채널 정보
+        self.guild_channels = {}  # guild_id -> 그 서버에 생성된 음성 채널 ID 집합 (서버 정보가 없는 예전 기록은 None)
+        self.creator_channels = {}  # (guild_id, creator_id) -> 그 서버에서 사용자가 생성한 음성 채널 ID 집합
+        self.pool_channels = {}  # category_id -> 그 카테고리에 숨겨 둔 대기 채널 ID 집합
+        self.allowed = {}  # guild_id -> 봇 사용이 허용된 텍스트 채널 ID 집합
+        self._allowed_legacy = set()  # 서버 정보 없이 예전 형식으로 저장된 허용 채널 ID
+        self._allowed_version = None  # 마지막으로 읽거나 쓴 허용 채널 데이터의 버전
+        self._allowed_checked_at = 0.0  # 허용 채널 데이터의 버전을 마지막으로 확인한 시각
+        self._channel_changes = {}  # 저장 대기 중인 채널 변경 (channel_id -> 기록, 삭제는 None)
+        self._allowed_changes = {}  # 저장 대기 중인 허용 채널 변경 (channel_id -> (guild_id, 존재 여부))
+        self._flush_task = None  # 대기 중인 지연 저장 작업
+        self._write_lock = asyncio.Lock()  # 저장이 동시에 일어나지 않도록 막는 잠금
+
+    def load(self):
+        """봇 시작 시 한 번만 저장소를 읽어 메모리에 올립니다."""
+        started = time.perf_counter()
+        if self.storage is None:
+            self.storage = create_storage()
+        self.channels = {d['channel_id']: d for d in self.storage.load_channels() if d.get('channel_id')}
+        self.guild_channels = {}
+        self.creator_channels = {}
+        self.pool_channels = {}
+        for record in self.channels.values():
+            self._index(record)
+        allowed = self.storage.load_allowed()
+        self._set_allowed(allowed)
+        self._allowed_version = self.storage.allowed_version()
+        STORAGE_SECONDS.observe(time.perf_counter() - started, operation='load')
+        STORAGE_BYTES.inc(self.storage.loaded_bytes(), operation='load')
+        STORAGE_ROWS.inc(len(self.channels) + len(allowed), operation='load')
+
+    # --- 생성된 음성 채널 ---
+    def get_channel(self, channel_id):
+        """채널 ID에 해당하는 기록을 반환합니다. 없으면 None을 반환합니다."""
+        return self.channels.get(channel_id)
+
+    def guild_channel_ids(self, guild_id):
+        """서버에 생성된 음성 채널 ID 목록을 반환합니다."""
+        return list(self.guild_channels.get(guild_id, ()))
+
+    def guild_ids(self):
+        """기록이 있는 서버 ID 목록을 반환합니다. 서버 정보가 없는 예전 기록은 포함하지 않습니다."""
+        return [guild_id for guild_id in self.guild_channels if guild_id is not None]
+
+    def creator_channel_count(self, guild_id, creator_id):
+        """사용자가 해당 서버에 생성하여 아직 남아있는 음성 채널 수를 반환합니다."""
+        return len(self.creator_channels.get((guild_id, creator_id), ()))
+
+    def pooled_channel_ids(self, category_id):
+        """카테고리에 숨겨 둔 대기 채널 ID 목록을 반환합니다."""
+        return list(self.pool_channels.get(category_id, ()))
+
+    def pooled_count(self):
+        """모든 카테고리의 대기 채널 수를 반환합니다."""
+        return sum(len(channel_ids) for channel_ids in self.pool_channels.values())
+
+    def is_pool_available(self, channel_id):
+        """채널이 풀에 들어 있어 꺼내 쓸 수 있는 대기 채널인지 확인합니다."""
+        record = self.channels.get(channel_id)
+        return record is not None and channel_id in self.pool_channels.get(record.get('category_id'), ())
+
+    def take_pooled_channel(self, category_id):
+        """카테고리의 대기 채널 하나를 꺼내 다른 요청이 함께 사용하지 않도록 예약하고 ID를 반환합니다.
+
+        기록은 add_channel()로 새 기록을 저장할 때 바뀌며, 사용하지 못한 경우 release_pooled_channel()로 되돌립니다.
+        대기 채널이 없으면 None을 반환합니다.
+        """
+        channel_ids = self.pool_channels.get(category_id)
+        if not channel_ids:
+            return None
+        channel_id = channel_ids.pop()
+        if not channel_ids:
+            del self.pool_channels[category_id]
+        return channel_id
+
+    def release_pooled_channel(self, channel_id):
+        """take_pooled_channel()로 꺼낸 대기 채널을 다시 풀에 넣습니다."""
+        record = self.channels.get(channel_id)
+        if record is not None and record.get('pooled'):
+            self._index(record)
+
+    def _index(self, record):
+        """서버별, 생성자별, 대기 채널 색인에 기록을 추가합니다."""
+        self.guild_channels.setdefault(record.get('guild_id'), set()).add(record['channel_id'])
+        if record.get('creator_id') is not None:
+            self.creator_channels.setdefault((record.get('guild_id'), record['creator_id']), set()).add(record['channel_id'])
+        if record.get('pooled'):
+            self.pool_channels.setdefault(record.get('category_id'), set()).add(record['channel_id'])
+
+    def _unindex(self, record):
+        """서버별, 생성자별, 대기 채널 색인에서 기록을 제거합니다."""
+        indexes = ((self.guild_channels, record.get('guild_id')),
+                   (self.creator_channels, (record.get('guild_id'), record.get('creator_id'))),
+                   (self.pool_channels, record.get('category_id')))
+        for index, key in indexes:
+            channel_ids = index.get(key)
+            if channel_ids is not None:
+                channel_ids.discard(record['channel_id'])
+                if not channel_ids:
+                    del index[key]
+
+    def add_channel(self, record):
+        """생성된 음성 채널 기록을 추가합니다."""
+        previous = self.channels.get(record['channel_id'])
+        if previous is not None:
+            self._unindex(previous)
+        self.channels[record['channel_id']] = record
+        self._index(record)
+        self._channel_changes[record['channel_id']] = record
+        self._schedule_flush()
+
+    def remove_channels(self, channel_ids):
+        """주어진 채널 ID들의 기록을 삭제합니다."""
+        removed = False
+        for channel_id in channel_ids:
+            record = self.channels.pop(channel_id, None)
+            if record is not None:
+                self._unindex(record)
+                self._channel_changes[channel_id] = None
+                removed = True
+        if removed:
+            self._schedule_flush()
+
+    def forget_channels(self, channel_ids):
+        """기록을 메모리에서만 지우고 저장소에는 삭제를 기록하지 않습니다.
+
+        다른 샤드가 담당하는 서버의 예전 기록처럼, 이 프로세스만 관리하지 않을 뿐 저장소에는 남아야 하는 경우에 사용합니다.
+        """
+        for channel_id in channel_ids:
+            record = self.channels.pop(channel_id, None)
+            if record is not None:
+                self._unindex(record)
+                self._channel_changes.pop(channel_id, None)
+
+    def remove_channel(self, channel_id):
+        """채널 ID 하나의 기록을 삭제합니다."""
+        self.remove_channels((channel_id,))
+
+    def update_channel(self, channel_id, **fields):
+        """기록의 일부 항목을 수정합니다. 기록이 없으면 아무것도 하지 않습니다."""
+        record = self.channels.get(channel_id)
+        if record is None:
+            return
+        reindex = any(key in fields for key in ('guild_id', 'creator_id', 'category_id', 'pooled'))
+        if reindex:
+            self._unindex(record)
+        record.update(fields)
+        if reindex:
+            self._index(record)
+        self._channel_changes[channel_id] = record
+        self._schedule_flush()
+
+    # --- 허용된 텍스트 채널 ---
+    def _set_allowed(self, data):
+        """저장소에서 읽은 허용 채널 목록으로 서버별 집합을 다시 만듭니다."""
+        self.allowed = {}
+        self._allowed_legacy = set()
+        for entry in data:
+            # 예전 형식(채널 ID만 저장된 정수)도 읽을 수 있도록 합니다.
+            if isinstance(entry, int):
+                self._allowed_legacy.add(entry)
+            elif entry.get('guild_id') is None:
+                self._allowed_legacy.add(entry['channel_id'])
+            else:
+                self.allowed.setdefault(entry['guild_id'], set()).add(entry['channel_id'])
+
+    def is_allowed(self, channel_id, guild_id):
+        """봇 사용이 허용된 채널인지 확인합니다. 파일 입출력 없이 집합 조회만 합니다."""
+        if channel_id in self.allowed.get(guild_id, ()):
+            return True
+        if channel_id in self._allowed_legacy:
+            # 예전 형식으로 저장된 채널은 처음 사용될 때 서버 정보를 채워 넣습니다.
+            self._allowed_legacy.discard(channel_id)
+            self.allowed.setdefault(guild_id, set()).add(channel_id)
+            self._allowed_changes[channel_id] = (guild_id, True)
+            self._schedule_flush()
+            return True
+        return False
+
+    async def refresh_allowed(self):
+        """허용 채널 데이터가 외부에서 수정되었으면 다시 읽어옵니다. 확인은 일정 간격으로만 수행합니다."""
+        now = time.monotonic()
+        if now - self._allowed_checked_at < self.recheck_interval:
+            return
+        self._allowed_checked_at = now
+        # 아직 저장되지 않은 변경 사항이 있으면 메모리의 내용을 우선합니다.
+        if self._allowed_changes:
+            return
+        # SQLite 저장소는 저장 중인 작업자 스레드와 잠금을 공유하므로, 버전 확인도 이벤트 루프 밖에서 실행합니다.
+        version = await asyncio.to_thread(self.storage.allowed_version)
+        if version == self._allowed_version or self._allowed_changes:
+            return
+        data = await asyncio.to_thread(self.storage.load_allowed)
+        # 읽는 동안 명령어로 바뀐 내용이 있으면 덮어쓰지 않고 다음 확인 때 다시 읽습니다.
+        if self._allowed_changes:
+            return
+        self._set_allowed(data)
+        self._allowed_version = version
+
+    def guild_allowed_ids(self, guild_id):
+        """서버에서 봇 사용이 허용된 텍스트 채널 ID 목록을 반환합니다."""
+        return list(self.allowed.get(guild_id, ()))
+
+    def allowed_channel_ids(self):
+        """모든 서버의 허용 채널 ID를 정렬된 리스트로 반환합니다."""
+        ids = set(self._allowed_legacy)
+        for channel_ids in self.allowed.values():
+            ids.update(channel_ids)
+        return sorted(ids)
+
+    def add_allowed(self, channel_id, guild_id):
+        """허용 채널을 추가합니다. 이미 등록되어 있으면 False를 반환합니다."""
+        if self.is_allowed(channel_id, guild_id):
+            return False
+        self.allowed.setdefault(guild_id, set()).add(channel_id)
+        self._allowed_changes[channel_id] = (guild_id, True)
+        self._schedule_flush()
+        return True
+
+    def remove_allowed(self, channel_id, guild_id):
+        """허용 채널을 제거합니다. 등록되지 않은 채널이면 False를 반환합니다."""
+        if not self.is_allowed(channel_id, guild_id):
+            return False
+        self.allowed[guild_id].discard(channel_id)
+        if not self.allowed[guild_id]:
+            del self.allowed[guild_id]
+        self._allowed_changes[channel_id] = (guild_id, False)
+        self._schedule_flush()
+        return True
+
+    # --- 저장 ---
+    def _channels_snapshot(self):
+        """저장할 생성 채널 목록의 복사본을 만듭니다."""
+        return [dict(d) for d in self.channels.values()]
+
+    def _allowed_snapshot(self):
+        """저장할 허용 채널 목록의 복사본을 만듭니다."""
+        data = [{'channel_id': channel_id, 'guild_id': None} for channel_id in sorted(self._allowed_legacy)]
+        for guild_id in sorted(self.allowed):
+            data.extend({'channel_id': channel_id, 'guild_id': guild_id} for channel_id in sorted(self.allowed[guild_id]))
+        return data
+
+    def _schedule_flush(self):
+        """지연 저장 작업이 없으면 예약합니다."""
+        if self._flush_task is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # 이벤트 루프 밖에서 호출된 경우 flush()를 직접 호출해야 저장됩니다.
+                return
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        """잠시 기다렸다가 그동안 쌓인 변경 사항을 한 번에 저장합니다."""
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        await self._write_changes()
+
+    async def _write_changes(self):
+        """쌓인 변경 사항을 이벤트 루프를 막지 않도록 별도 스레드에서 기록합니다."""
+        async with self._write_lock:
+            if not (self._channel_changes or self._allowed_changes):
+                return
+            channel_changes, self._channel_changes = self._channel_changes, {}
+            allowed_changes, self._allowed_changes = self._allowed_changes, {}
+            # 기록 내용은 이벤트 루프에서 복사해 두어, 스레드에서 쓰는 동안 바뀌지 않도록 합니다.
+            channel_changes = {k: (dict(v) if v is not None else None) for k, v in channel_changes.items()}
+            channels_snapshot = allowed_snapshot = None
+            if self.storage.full_snapshot:
+                channels_snapshot = self._channels_snapshot() if channel_changes else None
+                allowed_snapshot = self._allowed_snapshot() if allowed_changes else None
+            try:
+                await asyncio.to_thread(self._write, channel_changes, allowed_changes, channels_snapshot, allowed_snapshot)
+            except Exception as e:
+                print(f'채널 정보 저장 중 오류 발생: {e}')
+                # 실패한 변경 사항은 그 사이의 새 변경보다 앞서도록 다시 합쳐서 재시도합니다.
+                self._channel_changes = {**channel_changes, **self._channel_changes}
+                self._allowed_changes = {**allowed_changes, **self._allowed_changes}
+                self._schedule_flush()
+
+    def _write(self, channel_changes, allowed_changes, channels_snapshot, allowed_snapshot):
+        """저장소에 기록하고, 직접 저장한 내용을 외부 변경으로 오인하지 않도록 버전을 기억합니다. 별도 스레드에서 실행됩니다."""
+        started = time.perf_counter()
+        written = self.storage.write(channel_changes, allowed_changes, channels_snapshot, allowed_snapshot)
+        STORAGE_SECONDS.observe(time.perf_counter() - started, operation='save')
+        STORAGE_BYTES.inc(written or 0, operation='save')
+        STORAGE_ROWS.inc(len(channel_changes) + len(allowed_changes), operation='save')
+        if allowed_changes:
+            self._allowed_version = self.storage.allowed_version()
+
+    async def flush(self):
+        """대기 중인 지연 저장을 취소하고 즉시 저장합니다. 종료 시 호출됩니다."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._write_changes()
+
+# 봇 전체에서 공유하는 채널 레지스트리
+registry = ChannelRegistry()
+
+# --- 요청 제한 (토큰 버킷) ---
+
+class TokenBucketLimiter:
+    """키(사용자 ID, 서버 ID 등)마다 토큰 버킷을 두어 요청 빈도를 제한하는 클래스입니다.
+
+    버킷에는 최대 capacity개의 토큰이 모이고, refill_seconds마다 토큰이 하나씩 다시 채워집니다.
+    요청 한 번에 토큰 하나를 사용하므로, 연속으로 capacity번까지 허용한 뒤에는 채워지는 속도만큼만 허용합니다.
+    """
+    def __init__(self, capacity, refill_seconds, prune_threshold=4096):
+        self.capacity = capacity  # 버킷에 모을 수 있는 최대 토큰 수
+        self.refill_seconds = refill_seconds  # 토큰 하나가 다시 채워지는 데 걸리는 시간(초)
+        self.buckets = {}  # key -> (남은 토큰 수, 마지막으로 갱신한 시각)
+        self._prune_at = prune_threshold  # 버킷 수가 이 값을 넘으면 가득 찬 버킷을 정리합니다.
+
+    def _tokens(self, key, now):
+        tokens, updated = self.buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) / self.refill_seconds)
+
+    def retry_after(self, key, now):
+        """토큰이 남아있으면 0을, 없으면 다음 토큰이 채워질 때까지 남은 시간(초)을 반환합니다."""
+        tokens = self._tokens(key, now)
+        return 0.0 if tokens >= 1 else (1 - tokens) * self.refill_seconds
+
+    def consume(self, key, now):
+        """토큰 하나를 사용합니다. retry_after()가 0인지 먼저 확인해야 합니다."""
+        self.buckets[key] = (self._tokens(key, now) - 1, now)
+        if len(self.buckets) > self._prune_at:
+            self._prune(now)
+
+    def _prune(self, now):
+        """가득 찬 버킷은 새로 만든 버킷과 같으므로 지워서 메모리 사용량을 제한합니다."""
+        self.buckets = {key: state for key, state in self.buckets.items() if self._tokens(key, now) < self.capacity}
+        self._prune_at = max(self._prune_at, len(self.buckets) * 2)
+
+# 사용자 한 명은 연속 3번까지, 이후 20초마다 1번씩 /createvoice를 사용할 수 있습니다.
+CREATE_USER_BURST = 3
+CREATE_USER_REFILL_SECONDS = 20
+# 서버 하나에서는 연속 10번까지, 이후 3초마다 1번씩 /createvoice를 사용할 수 있습니다.
+CREATE_GUILD_BURST = 10
+CREATE_GUILD_REFILL_SECONDS = 3
+# 사용자 한 명이 서버마다 동시에 유지할 수 있는 음성 채널 수입니다. (생성 중인 채널 포함)
+MAX_CHANNELS_PER_CREATOR = 3
+
+create_user_limiter = TokenBucketLimiter(CREATE_USER_BURST, CREATE_USER_REFILL_SECONDS)
+create_guild_limiter = TokenBucketLimiter(CREATE_GUILD_BURST, CREATE_GUILD_REFILL_SECONDS)
 
 # --- UI 컴포넌트 (버튼) 클래스 ---
 
-class ConfirmView(ui.View):
-    """채널 삭제 확인/취소 버튼을 표시하는 View 클래스입니다."""
-    def __init__(self, voice_channel: discord.VoiceChannel, creator_id: int):
-        super().__init__(timeout=60)  # 60초 후 버튼 비활성화
-        self.voice_channel = voice_channel
-        self.creator_id = creator_id
-
-    async def remove_channel_from_json(self):
-        """JSON 파일에서 해당 음성 채널 정보를 삭제합니다."""
-        channels_data = load_json(CHANNELS_FILE)
-        # 삭제할 채널 ID를 제외한 나머지 채널 정보만 다시 저장합니다.
-        updated_data = [d for d in channels_data if d.get('channel_id') != self.voice_channel.id]
-        save_json(updated_data, CHANNELS_FILE)
-
-    @ui.button(label='확인', style=ButtonStyle.red)
-    async def confirm(self, interaction: discord.Interaction, button: ui.Button):
+# 버튼의 custom_id에 채널 ID를 담아두므로, 메시지마다 View 객체를 메모리에 보관하지 않아도 되고
+# 봇이 재시작되어도 버튼이 계속 동작합니다. 채널 정보는 버튼을 누를 때 레지스트리에서 찾습니다.
+
+async def check_manage_permission(interaction: discord.Interaction, channel_id: int):
+    """버튼을 누른 사용자가 채널을 관리할 수 있는지 확인하고, 채널 기록을 반환합니다. 권한이 없으면 None을 반환합니다."""
+    data = registry.get_channel(channel_id)
+    if data is None or data.get('pooled'):
+        # 대기 채널 풀로 돌아간 채널도 사용자 입장에서는 삭제된 채널입니다.
+        await interaction.response.edit_message(content='🗑️ 이미 삭제된 채널입니다.', embed=None, view=None)
+        return None
+
+    # 버튼을 누른 사용자가 채널 생성자이거나 어드민/서버 관리자인지 확인합니다.
+    is_creator = interaction.user.id == data.get('creator_id')
+    is_admin_id = interaction.user.id in ADMIN_IDS
+    is_server_admin = interaction.user.guild_permissions.administrator
+
+    if not (is_creator or is_admin_id or is_server_admin):
+        await interaction.response.send_message("❌ 채널을 생성한 유저, 어드민 또는 서버 관리자만 삭제할 수 있습니다.", ephemeral=True)
+        return None
+    return data
+
+
+class DeleteChannelButton(ui.DynamicItem[ui.Button], template=r'voicebot:delete:(?P<channel_id>[0-9]+)'):
+    """'채널 삭제' 버튼입니다."""
+    def __init__(self, channel_id: int):
+        super().__init__(ui.Button(label='채널 삭제', style=ButtonStyle.danger, custom_id=f'voicebot:delete:{channel_id}'))
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(int(match['channel_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        """'채널 삭제' 버튼 클릭 시 실행됩니다."""
+        if await check_manage_permission(interaction, self.channel_id) is None:
+            return
+        # 확인/취소 버튼이 있는 ConfirmView로 메시지를 교체합니다.
+        await interaction.response.edit_message(content='**정말로 채널을 삭제하시겠습니까?**', view=ConfirmView(self.channel_id), embed=None)
+
+
+# '채널 삭제'를 누른 뒤 '확인' 버튼이 유효한 시간(초)입니다.
+CONFIRM_TIMEOUT = 60
+
+class ConfirmDeleteButton(ui.DynamicItem[ui.Button], template=r'voicebot:confirm:(?P<channel_id>[0-9]+):(?P<expires_at>[0-9]+)'):
+    """채널 삭제 '확인' 버튼입니다. 만료 시각을 custom_id에 담아 두므로 재시작 후에도 CONFIRM_TIMEOUT이 지나면 동작하지 않습니다."""
+    def __init__(self, channel_id: int, expires_at: int = None):
+        if expires_at is None:
+            expires_at = int(time.time()) + CONFIRM_TIMEOUT
+        super().__init__(ui.Button(label='확인', style=ButtonStyle.red, custom_id=f'voicebot:confirm:{channel_id}:{expires_at}'))
+        self.channel_id = channel_id
+        self.expires_at = expires_at
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(int(match['channel_id']), int(match['expires_at']))
+
+    async def callback(self, interaction: discord.Interaction):
         """'확인' 버튼 클릭 시 실행됩니다."""
-        channel_name = self.voice_channel.name
-        await self.remove_channel_from_json() # JSON에서 채널 정보 제거
-        await self.voice_channel.delete(reason=f'{interaction.user}의 요청으로 삭제') # 채널 삭제
-        self.clear_items() # 모든 버튼 제거
+        if time.time() > self.expires_at:
+            # 확인 시간이 지난 경우 삭제하지 않고 원래의 관리 버튼으로 되돌립니다.
+            await interaction.response.edit_message(
+                content=f'⌛ {CONFIRM_TIMEOUT}초 안에 확인하지 않아 삭제가 취소되었습니다.', view=ManagementView(self.channel_id))
+            return
+        if await check_manage_permission(interaction, self.channel_id) is None:
+            return
+        voice_channel = interaction.guild.get_channel(self.channel_id)
+        registry.remove_channel(self.channel_id) # 레지스트리에서 채널 정보 제거
+        if voice_channel is None:
+            # 채널이 이미 직접 삭제된 경우 기록만 정리합니다.
+            await interaction.response.edit_message(content='🗑️ 이미 삭제된 채널입니다.', embed=None, view=None)
+            return
+        channel_name = voice_channel.name
+        await voice_channel.delete(reason=f'{interaction.user}의 요청으로 삭제') # 채널 삭제
+        CHANNELS_DELETED.inc(reason='manual')
         # 메시지를 수정하여 채널이 삭제되었음을 알립니다.
-        await interaction.response.edit_message(content=f'🗑️ **{channel_name}** 채널이 삭제되었습니다.', embed=None, view=self)
+        await interaction.response.edit_message(content=f'🗑️ **{channel_name}** 채널이 삭제되었습니다.', embed=None, view=None)
+
+
+class CancelDeleteButton(ui.DynamicItem[ui.Button], template=r'voicebot:cancel:(?P<channel_id>[0-9]+)'):
+    """채널 삭제 '취소' 버튼입니다."""
+    def __init__(self, channel_id: int):
+        super().__init__(ui.Button(label='취소', style=ButtonStyle.grey, custom_id=f'voicebot:cancel:{channel_id}'))
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(int(match['channel_id']))
 
-    @ui.button(label='취소', style=ButtonStyle.grey)
-    async def cancel(self, interaction: discord.Interaction, button: ui.Button):
+    async def callback(self, interaction: discord.Interaction):
         """'취소' 버튼 클릭 시 실행됩니다."""
         # 이전의 관리 View(채널 삭제 버튼만 있는)로 메시지를 되돌립니다.
-        # creator_id를 다시 전달하여 권한 확인을 유지합니다.
-        view = ManagementView(voice_channel=self.voice_channel, creator_id=self.creator_id)
-        await interaction.response.edit_message(view=view)
+        await interaction.response.edit_message(view=ManagementView(self.channel_id))
+
+
+class ConfirmView(ui.View):
+    """채널 삭제 확인/취소 버튼을 표시하는 View 클래스입니다."""
+    def __init__(self, channel_id: int):
+        super().__init__(timeout=None)
+        self.add_item(ConfirmDeleteButton(channel_id))
+        self.add_item(CancelDeleteButton(channel_id))
 
 
 class ManagementView(ui.View):
     """채널 관리(삭제) 버튼을 표시하는 View 클래스입니다."""
-    def __init__(self, voice_channel: discord.VoiceChannel, creator_id: int):
+    def __init__(self, channel_id: int):
         super().__init__(timeout=None)  # 타임아웃을 설정하지 않아 버튼이 계속 활성화됩니다.
-        self.voice_channel = voice_channel
-        self.creator_id = creator_id # 채널 생성자의 ID를 저장합니다.
+        self.add_item(DeleteChannelButton(channel_id))
 
-    @ui.button(label='채널 삭제', style=ButtonStyle.danger)
-    async def delete_channel(self, interaction: discord.Interaction, button: ui.Button):
-        """'채널 삭제' 버튼 클릭 시 실행됩니다."""
-        # 버튼을 누른 사용자가 채널 생성자이거나 어드민/서버 관리자인지 확인합니다.
-        is_creator = interaction.user.id == self.creator_id
-        is_admin_id = interaction.user.id in ADMIN_IDS
-        is_server_admin = interaction.user.guild_permissions.administrator
-        
-        if not (is_creator or is_admin_id or is_server_admin):
-            await interaction.response.send_message("❌ 채널을 생성한 유저, 어드민 또는 서버 관리자만 삭제할 수 있습니다.", ephemeral=True)
-            return
-        
-        # 확인/취소 버튼이 있는 ConfirmView로 메시지를 교체합니다.
-        view = ConfirmView(voice_channel=self.voice_channel, creator_id=self.creator_id)
-        await interaction.response.edit_message(content='**정말로 채널을 삭제하시겠습니까?**', view=view, embed=None)
+class PaginatorView(ui.View):
+    """여러 페이지의 임베드를 이전/다음 버튼으로 넘겨 보는 View 클래스입니다."""
+    def __init__(self, pages: list):
+        super().__init__(timeout=300)  # 5분 후 버튼 비활성화
+        self.pages = pages
+        self.index = 0
+        self.update_buttons()
+
+    def update_buttons(self):
+        """첫 페이지와 마지막 페이지에서는 해당 방향 버튼을 비활성화합니다."""
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index == len(self.pages) - 1
+
+    @ui.button(label='◀ 이전', style=ButtonStyle.grey)
+    async def previous_page(self, interaction: discord.Interaction, button: ui.Button):
+        """'이전' 버튼 클릭 시 실행됩니다."""
+        self.index -= 1
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.pages[self.index], view=self)
+
+    @ui.button(label='다음 ▶', style=ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: ui.Button):
+        """'다음' 버튼 클릭 시 실행됩니다."""
+        self.index += 1
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.pages[self.index], view=self)
 
 # --- 명령어 및 기능(Cog) 클래스 ---
 
+# 생성된 음성 채널이 이 시간 동안 비어있으면 자동으로 삭제합니다.
+EMPTY_CHANNEL_TIMEOUT = timedelta(minutes=10)
+# 자동 삭제를 동시에 처리하는 작업자 수입니다. 라우트별 레이트 리밋은 discord.py가 처리하며,
+# 이 값은 한꺼번에 만료된 채널이 많을 때 전역 레이트 리밋에 걸리지 않도록 동시 요청 수를 제한합니다.
+REAP_CONCURRENCY = 5
+# 서버마다 동시에 처리하는 /createvoice 요청 수입니다. 나머지 요청은 순서대로 대기합니다.
+CREATE_CONCURRENCY_PER_GUILD = 2
+# /listchannels에서 캐시에 없는 채널을 동시에 조회하는 최대 요청 수입니다.
+LIST_FETCH_CONCURRENCY = 10
+# /listchannels에서 조회한 채널 이름(또는 찾을 수 없음)을 기억하는 시간(초)입니다.
+LIST_CACHE_TTL = 300
+# /listchannels 임베드 한 페이지에 표시하는 채널 수입니다. (설명란 4096자 제한을 넘지 않도록)
+LIST_PAGE_SIZE = 30
+# 허용된 텍스트 채널이 속한 카테고리마다 미리 만들어 숨겨 둘 음성 채널 수입니다. (0이면 사용하지 않음)
+# /createvoice는 대기 채널의 이름과 설정을 바꿔 공개하기만 하므로 채널 생성 요청을 기다리지 않습니다.
+WARM_POOL_SIZE = int(os.getenv('WARM_POOL_SIZE', '0'))
+# 숨겨 둔 대기 채널의 이름입니다.
+POOL_CHANNEL_NAME = '대기 채널'
+
+def pool_overwrites(category):
+    """대기 채널을 봇 외에는 아무도 보거나 접속할 수 없도록 숨기는 권한 설정을 만듭니다."""
+    # 카테고리에서 보기 권한을 허용받은 대상까지 모두 막아야 채널이 보이지 않습니다.
+    hidden = discord.PermissionOverwrite(view_channel=False, connect=False)
+    overwrites = {target: hidden for target in category.overwrites}
+    overwrites[category.guild.default_role] = hidden
+    overwrites[category.guild.me] = discord.PermissionOverwrite(view_channel=True, connect=True)
+    return overwrites
+
 class VoiceManagement(commands.Cog):
     """봇의 주요 기능(명령어, 백그라운드 작업 등)을 담고 있는 클래스입니다."""
     def __init__(self, bot):
         self.bot = bot
-        self.empty_since = {}  # 각 채널이 비어있기 시작한 시간을 기록하는 딕셔너리
+        self.reap_timers = {}  # channel_id -> 자동 삭제 예정 시각에 실행될 타이머
+        self.reaping = set()  # 자동 삭제 요청을 보낸 채널 ID (삭제 이벤트를 직접 삭제로 오인하지 않기 위함)
+        self.reap_queue = asyncio.Queue()  # 삭제 시각이 된 채널 ID 대기열
+        self.reap_workers = []  # 대기열을 처리하는 작업자 태스크
+        self.reap_pending = 0  # 대기 중이거나 처리 중인 채널 수
+        self.reap_batch_started = None  # 대기열이 비어있지 않게 된 시각
+        self.reap_batch_size = 0  # 현재 대기열이 비워질 때까지 처리한 채널 수
+        self.reap_stats = {'deleted': 0, 'max_backlog': 0, 'last_drain_seconds': 0.0, 'last_drain_size': 0}
+        self.create_slots = {}  # guild_id -> 채널 생성 동시 처리 수를 제한하는 세마포어
+        self.creating = {}  # (guild_id, user_id) -> 처리 중인 /createvoice 요청 수
+        self.pool_refills = {}  # category_id -> 대기 채널을 채우는 중인 작업
+        self.channel_line_cache = {}  # channel_id -> (만료 시각, /listchannels에 표시할 한 줄)
         self.check_empty_channels.start() # 봇이 준비되면 백그라운드 작업 시작
 
-    def cog_unload(self):
-        """Cog가 언로드될 때 백그라운드 작업을 중지합니다."""
+    async def cog_load(self):
+        """Cog가 로드될 때 자동 삭제 작업자들을 시작하고, 채널 상태 메트릭을 연결합니다."""
+        self.reap_workers = [asyncio.create_task(self._reap_worker()) for _ in range(REAP_CONCURRENCY)]
+        CHANNELS_TRACKED.set_function(lambda: [({}, len(registry.channels) - registry.pooled_count())])
+        POOL_CHANNELS.set_function(lambda: [({}, registry.pooled_count())])
+        CHANNELS_EMPTY.set_function(lambda: [({}, len(self.reap_timers) + self.reap_pending)])
+        REAP_BACKLOG.set_function(lambda: [({}, self.reap_queue.qsize())])
+
+    async def cog_unload(self):
+        """Cog가 언로드될 때 백그라운드 작업과 타이머를 중지하고, 저장되지 않은 변경 사항을 파일에 기록합니다."""
         self.check_empty_channels.cancel()
+        for timer in self.reap_timers.values():
+            timer.cancel()
+        self.reap_timers.clear()
+        for worker in self.reap_workers:
+            worker.cancel()
+        self.reap_workers = []
+        for task in self.pool_refills.values():
+            task.cancel()
+        self.pool_refills.clear()
+        await registry.flush()
 
     # --- 데코레이터 (권한 확인용) ---
     def is_admin():
@@ -160,78 +1168,392 @@ class VoiceManagement(commands.Cog):
     def is_allowed_channel():
         """명령어가 허용된 채널에서 사용되었는지 확인하는 데코레이터입니다."""
         async def predicate(interaction: discord.Interaction) -> bool:
-            allowed_channels = load_json(ALLOWED_CHANNELS_FILE)
-            if interaction.channel_id not in allowed_channels:
+            await registry.refresh_allowed()
+            if not registry.is_allowed(interaction.channel_id, interaction.guild_id):
                 await interaction.response.send_message("❌ 이 채널에서는 봇을 사용할 수 없습니다.", ephemeral=True)
                 return False
             return True
         return app_commands.check(predicate)
     
+    # --- 자동 삭제 (이벤트 기반) ---
+    def schedule_reap(self, channel_id):
+        """채널이 비었을 때 호출되어, 비어있기 시작한 시각으로부터 10분 뒤에 삭제하도록 예약합니다."""
+        if channel_id in self.reap_timers:
+            return
+        data = registry.get_channel(channel_id)
+        if data is None or data.get('pooled'):
+            # 대기 채널은 원래 비어있으므로 자동 삭제하지 않습니다.
+            return
+        # 비어있기 시작한 시각은 레지스트리에 저장되므로 재시작해도 이어서 계산됩니다.
+        empty_since = data.get('empty_since')
+        if empty_since is None:
+            empty_since = time.time()
+            registry.update_channel(channel_id, empty_since=empty_since)
+        delay = empty_since + EMPTY_CHANNEL_TIMEOUT.total_seconds() - time.time()
+        loop = asyncio.get_running_loop()
+        self.reap_timers[channel_id] = loop.call_later(max(delay, 0), self._on_reap_deadline, channel_id)
+
+    def cancel_reap(self, channel_id):
+        """누군가 채널에 다시 들어왔을 때 예약된 삭제를 취소합니다."""
+        timer = self.reap_timers.pop(channel_id, None)
+        if timer is not None:
+            timer.cancel()
+        data = registry.get_channel(channel_id)
+        if data is not None and data.get('empty_since') is not None:
+            registry.update_channel(channel_id, empty_since=None)
+
+    def _on_reap_deadline(self, channel_id):
+        """예약된 시각이 되면 채널을 삭제 대기열에 넣습니다."""
+        self.reap_timers.pop(channel_id, None)
+        if self.reap_pending == 0:
+            self.reap_batch_started = time.monotonic()
+            self.reap_batch_size = 0
+        self.reap_pending += 1
+        self.reap_queue.put_nowait(channel_id)
+        self.reap_stats['max_backlog'] = max(self.reap_stats['max_backlog'], self.reap_queue.qsize())
+
+    async def _reap_worker(self):
+        """대기열에서 채널을 하나씩 꺼내 삭제합니다. 여러 작업자가 동시에 실행됩니다."""
+        while True:
+            channel_id = await self.reap_queue.get()
+            try:
+                await self.reap_channel(channel_id)
+            finally:
+                self.reap_queue.task_done()
+                self.reap_pending -= 1
+                self.reap_batch_size += 1
+                if self.reap_pending == 0:
+                    # 대기열이 모두 비워지면 처리에 걸린 시간을 기록합니다.
+                    elapsed = time.monotonic() - self.reap_batch_started
+                    self.reap_stats['last_drain_seconds'] = elapsed
+                    self.reap_stats['last_drain_size'] = self.reap_batch_size
+                    REAP_DRAIN_SECONDS.observe(elapsed)
+                    if self.reap_batch_size > 1:
+                        print(f'자동 삭제 대기열 처리 완료: {self.reap_batch_size}개 채널, {elapsed:.1f}초 소요')
+
+    async def reap_channel(self, channel_id):
+        """10분 이상 비어있는 채널을 삭제하고, 원본 관리 메시지를 수정합니다.
+
+        대기 채널 풀이 부족한 카테고리의 채널은 삭제하지 않고 숨겨서 풀로 되돌립니다.
+        """
+        data = registry.get_channel(channel_id)
+        if data is None or data.get('pooled'):
+            # 그 사이에 버튼 등으로 이미 삭제되었거나 풀로 돌아간 채널입니다.
+            return
+
+        try:
+            # 봇 캐시 또는 API 호출을 통해 채널 객체를 가져옵니다.
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+            # 채널이 음성 채널이 아니면 목록에서 제거합니다.
+            if not isinstance(channel, discord.VoiceChannel):
+                registry.remove_channel(channel_id)
+                return
+
+            # 타이머가 실행되기 직전에 누군가 들어온 경우 삭제하지 않습니다.
+            if len(channel.members) > 0:
+                self.cancel_reap(channel_id)
+                return
+
+            print(f"'{channel.name}' 채널이 10분 이상 비어있어 삭제합니다.")
+
+            async def edit_message():
+                """원본 관리 메시지를 수정하여 자동 삭제되었음을 알립니다."""
+                msg_channel_id = data.get('message_channel_id')
+                msg_id = data.get('message_id')
+                if not (msg_channel_id and msg_id):
+                    return
+                try:
+                    # 메시지를 먼저 가져오지 않고 ID만으로 바로 수정하여 API 호출을 줄입니다.
+                    message = self.bot.get_partial_messageable(msg_channel_id).get_partial_message(msg_id)
+                    await message.edit(content=f"🗑️ **{channel.name}** 채널이 10분 이상 비어있어 자동으로 삭제되었습니다.", embed=None, view=None)
+                except discord.NotFound:
+                    print(f"자동 삭제 메시지를 수정하려 했으나 원본 메시지를 찾을 수 없습니다. (ID: {msg_id})")
+                except Exception as e:
+                    print(f"자동 삭제 메시지 수정 중 오류 발생: {e}")
+
+            category = channel.category
+            if category is not None and category.id in self.pool_categories(channel.guild) \
+                    and len(registry.pooled_channel_ids(category.id)) < WARM_POOL_SIZE:
+                # 메시지 수정과 채널 숨기기는 서로 다른 라우트이므로 동시에 요청합니다.
+                overwrites = pool_overwrites(category)
+                await asyncio.gather(edit_message(), channel.edit(
+                    name=POOL_CHANNEL_NAME, user_limit=0, overwrites=overwrites, reason="10분 이상 비어있어 대기 채널로 반환"))
+                if len(channel.members) > 0:
+                    # 숨기는 사이에 누군가 들어온 경우 풀에 넣지 않습니다.
+                    self.unpool_channel(channel)
+                    return
+                registry.add_channel({
+                    'channel_id': channel_id,
+                    'guild_id': channel.guild.id,
+                    'category_id': category.id,
+                    'pooled': True
+                })
+                # 채널은 삭제되지 않았으므로 삭제 수에는 포함하지 않습니다.
+                POOL_EVENTS.inc(event='recycled')
+                return
+
+            # 메시지 수정과 채널 삭제는 서로 다른 라우트이므로 동시에 요청합니다.
+            self.reaping.add(channel_id)
+            try:
+                await asyncio.gather(edit_message(), channel.delete(reason="10분 이상 비어있어 자동 삭제"))
+            finally:
+                self.reaping.discard(channel_id)
+            registry.remove_channel(channel_id)
+            self.reap_stats['deleted'] += 1
+            CHANNELS_DELETED.inc(reason='auto')
+
+        except discord.NotFound:
+            # 채널이 이미 삭제된 경우, 목록에서 제거합니다.
+            registry.remove_channel(channel_id)
+        except Exception as e:
+            print(f'채널 자동 삭제 중 오류 발생 (ID: {channel_id}): {e}')
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """음성 채널 입장/퇴장 시 자동 삭제를 예약하거나 취소합니다."""
+        # 음소거 등 같은 채널 안에서의 상태 변경은 무시합니다.
+        if before.channel == after.channel:
+            return
+        # 관리 중인 채널에 누군가 들어오면 예약된 삭제를 취소합니다.
+        if after.channel is not None and registry.get_channel(after.channel.id) is not None:
+            self.cancel_reap(after.channel.id)
+        # 관리 중인 채널에서 마지막 사람이 나가면 삭제를 예약합니다.
+        if before.channel is not None and registry.get_channel(before.channel.id) is not None:
+            if len(before.channel.members) == 0:
+                self.schedule_reap(before.channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """관리 중인 채널이 삭제된 경우 기록과 예약을 정리합니다."""
+        # 삭제 버튼으로 지운 채널은 기록이 먼저 제거되므로, 예약된 타이머는 항상 정리합니다.
+        self.cancel_reap(channel.id)
+        if registry.get_channel(channel.id) is not None and channel.id not in self.reaping:
+            # 봇을 거치지 않고 직접 삭제된 채널입니다.
+            CHANNELS_DELETED.inc(reason='external')
+            registry.remove_channel(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        """봇이 서버에서 나가거나 추방되면 그 서버의 기록과 예약을 정리합니다."""
+        self.forget_guild(guild.id)
+
+    def forget_guild(self, guild_id):
+        """서버의 모든 채널 기록(대기 채널 포함)과 예약된 삭제를 제거합니다."""
+        channel_ids = registry.guild_channel_ids(guild_id)
+        for channel_id in channel_ids:
+            self.cancel_reap(channel_id)
+        registry.remove_channels(channel_ids)
+
     # --- 백그라운드 작업 ---
-    @tasks.loop(minutes=1)
+    @tasks.loop(minutes=10)
     async def check_empty_channels(self):
-        """1분마다 생성된 음성 채널들을 확인하여 비어있는 채널을 자동으로 삭제합니다."""
-        channels_data = load_json(CHANNELS_FILE)
-        if not channels_data:
-            return
+        """봇 시작 직후와 10분마다 레지스트리와 실제 채널 상태를 맞춥니다."""
+        # 봇이 꺼져 있는 동안 나간 서버의 기록은 on_guild_remove로 정리되지 않으므로 여기서 제거합니다.
+        # 다른 샤드가 담당하는 서버는 이 프로세스의 서버 목록에 없으므로 제외합니다.
+        joined = {guild.id for guild in self.bot.guilds}
+        for guild_id in registry.guild_ids():
+            if owns_guild(guild_id) and guild_id not in joined:
+                print(f'봇이 참여하지 않은 서버(ID: {guild_id})의 채널 기록을 제거합니다.')
+                self.forget_guild(guild_id)
 
-        channels_to_remove = [] # 삭제할 채널 ID를 임시 저장할 리스트
-        for data in channels_data:
-            channel_id = data.get('channel_id')
-            if not channel_id:
-                continue
+        await self.reconcile(self.bot.guilds)
 
+        # 서버 정보가 없는 예전 기록만 API로 확인하고, 서버 정보를 채워 넣습니다.
+        # 샤드로 나누어 실행하면 모든 샤드가 같은 예전 기록을 읽으므로, 다른 샤드가 담당하는 서버의 기록은 메모리에서만 지웁니다.
+        channels_to_remove = [] # 목록에서 제거할 채널 ID를 임시 저장할 리스트
+        channels_to_forget = [] # 다른 샤드가 담당하거나 확인에 실패한 채널 ID
+        resolved_guild_ids = set() # 서버 정보를 채워 넣은 기록이 속한 서버 ID
+        for channel_id in registry.guild_channel_ids(None):
             try:
-                # 봇 캐시 또는 API 호출을 통해 채널 객체를 가져옵니다.
+                # 캐시에 있는 채널은 API를 호출하지 않습니다.
                 channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
-                
-                # 채널이 음성 채널이 아니면 목록에서 제거합니다.
+            except (discord.NotFound, discord.Forbidden):
+                # 삭제되었거나 봇이 더 이상 볼 수 없는 채널은 관리할 수 없으므로 기록을 제거합니다.
+                channels_to_remove.append(channel_id)
+                continue
+            except Exception as e:
+                # 일시적인 오류일 수 있으므로 저장소에는 남겨 두고, 이번 실행 동안은 다시 확인하지 않습니다.
+                print(f'채널 확인 중 오류 발생 (ID: {channel_id}): {e}')
+                channels_to_forget.append(channel_id)
+                continue
+            # 채널이 음성 채널이 아니면 목록에서 제거합니다.
+            if not isinstance(channel, discord.VoiceChannel):
+                channels_to_remove.append(channel_id)
+                continue
+            if not owns_guild(channel.guild.id):
+                channels_to_forget.append(channel_id)
+                continue
+            registry.update_channel(channel_id, guild_id=channel.guild.id)
+            resolved_guild_ids.add(channel.guild.id)
+
+        if channels_to_remove:
+            for channel_id in channels_to_remove:
+                self.cancel_reap(channel_id)
+            registry.remove_channels(channels_to_remove)
+        if channels_to_forget:
+            for channel_id in channels_to_forget:
+                self.cancel_reap(channel_id)
+            registry.forget_channels(channels_to_forget)
+        if resolved_guild_ids:
+            # 서버 정보를 찾은 채널은 다음 점검을 기다리지 않고 바로 상태를 맞춥니다.
+            guilds = [self.bot.get_guild(guild_id) for guild_id in resolved_guild_ids]
+            await self.reconcile([guild for guild in guilds if guild is not None])
+
+    async def reconcile(self, guilds):
+        """주어진 서버들에 대해 레지스트리와 서버 캐시의 채널 상태를 맞춥니다.
+
+        채널마다 API를 호출하지 않고 각 서버의 캐시와 서버별 기록만 확인하므로,
+        비용은 이 프로세스가 담당하는 서버의 기록 수에만 비례합니다.
+        재시작 전에 이미 10분이 지난 채널은 바로 삭제 대기열에 들어갑니다.
+        대기 채널 풀도 함께 점검하여 모자란 카테고리는 채우고, 더 이상 필요 없는 대기 채널은 삭제합니다.
+        """
+        started = time.perf_counter()
+        channels_to_remove = [] # 목록에서 제거할 채널 ID를 임시 저장할 리스트
+        pool_to_trim = [] # 삭제할 대기 채널
+        for guild in guilds:
+            if guild.unavailable:
+                # 서버 정보를 아직 받지 못한 경우 다음 점검 때 다시 확인합니다.
+                continue
+            pool_categories = self.pool_categories(guild)
+            pool_counts = {}
+            for channel_id in registry.guild_channel_ids(guild.id):
+                channel = guild.get_channel(channel_id)
+                # 서버 캐시에 없거나 음성 채널이 아니면 목록에서 제거합니다.
                 if not isinstance(channel, discord.VoiceChannel):
                     channels_to_remove.append(channel_id)
-                    continue
-
-                # 채널에 아무도 없는 경우
-                if len(channel.members) == 0:
-                    # 비어있는 상태가 처음 감지된 경우, 현재 시간을 기록합니다.
-                    if channel_id not in self.empty_since:
-                        self.empty_since[channel_id] = datetime.utcnow()
-                    # 비어있는 상태가 10분 이상 지속된 경우
-                    elif datetime.utcnow() - self.empty_since[channel_id] > timedelta(minutes=10):
-                        print(f"'{channel.name}' 채널이 10분 이상 비어있어 삭제합니다.")
-                        
-                        # 원본 관리 메시지를 수정하여 자동 삭제되었음을 알립니다.
-                        msg_channel_id = data.get('message_channel_id')
-                        msg_id = data.get('message_id')
-                        if msg_channel_id and msg_id:
-                            try:
-                                msg_channel = self.bot.get_channel(msg_channel_id) or await self.bot.fetch_channel(msg_channel_id)
-                                message = await msg_channel.fetch_message(msg_id)
-                                await message.edit(content=f"🗑️ **{channel.name}** 채널이 10분 이상 비어있어 자동으로 삭제되었습니다.", embed=None, view=None)
-                            except discord.NotFound:
-                                print(f"자동 삭제 메시지를 수정하려 했으나 원본 메시지를 찾을 수 없습니다. (ID: {msg_id})")
-                            except Exception as e:
-                                print(f"자동 삭제 메시지 수정 중 오류 발생: {e}")
-
-                        await channel.delete(reason="10분 이상 비어있어 자동 삭제")
-                        channels_to_remove.append(channel_id)
-                        if channel_id in self.empty_since:
-                            del self.empty_since[channel_id]
-                # 채널에 누군가 있는 경우, 비어있던 기록을 삭제합니다.
+                # 대기 채널은 자동 삭제 대상이 아니며, 풀을 유지하지 않는 카테고리이거나 정해진 수를 넘으면 삭제합니다.
+                elif registry.get_channel(channel_id).get('pooled'):
+                    if not registry.is_pool_available(channel_id):
+                        # /createvoice가 꺼내서 공개하는 중인 채널입니다.
+                        continue
+                    if len(channel.members) > 0:
+                        self.unpool_channel(channel)
+                        continue
+                    category_id = registry.get_channel(channel_id)['category_id']
+                    pool_counts[category_id] = pool_counts.get(category_id, 0) + 1
+                    if category_id not in pool_categories or pool_counts[category_id] > WARM_POOL_SIZE:
+                        pool_to_trim.append(channel)
+                # 비어있는데 삭제가 예약되지 않은 채널은 예약합니다.
+                elif len(channel.members) == 0:
+                    self.schedule_reap(channel_id)
+                # 채널에 누군가 있는 경우, 예약된 삭제를 취소합니다.
                 else:
-                    if channel_id in self.empty_since:
-                        del self.empty_since[channel_id]
+                    self.cancel_reap(channel_id)
+            for category in pool_categories.values():
+                if pool_counts.get(category.id, 0) < WARM_POOL_SIZE:
+                    self.schedule_refill(category)
+
+        # 삭제 대상 채널들을 레지스트리에서 최종적으로 제거합니다.
+        if channels_to_remove:
+            for channel_id in channels_to_remove:
+                self.cancel_reap(channel_id)
+            registry.remove_channels(channels_to_remove)
+        if pool_to_trim:
+            # 기록을 먼저 지워 다른 요청이 꺼내 쓰지 않도록 하고, 실제 삭제는 백그라운드에서 처리합니다.
+            registry.remove_channels([channel.id for channel in pool_to_trim])
+            asyncio.create_task(self.trim_pool(pool_to_trim))
+        RECONCILE_SECONDS.observe(time.perf_counter() - started)
+
+    # --- 대기 채널 풀 ---
+    def pool_categories(self, guild):
+        """대기 채널 풀을 유지할 카테고리(허용된 텍스트 채널이 속한 카테고리)를 category_id -> 카테고리로 반환합니다."""
+        if WARM_POOL_SIZE <= 0:
+            return {}
+        categories = {}
+        for channel_id in registry.guild_allowed_ids(guild.id):
+            category = getattr(guild.get_channel(channel_id), 'category', None)
+            if category is not None:
+                categories[category.id] = category
+        return categories
+
+    def schedule_refill(self, category):
+        """카테고리의 대기 채널을 채우는 작업을 백그라운드에서 시작합니다. 이미 실행 중이면 아무것도 하지 않습니다."""
+        if WARM_POOL_SIZE <= 0 or category.id in self.pool_refills:
+            return
+        self.pool_refills[category.id] = asyncio.create_task(self.refill_pool(category))
+
+    async def refill_pool(self, category):
+        """카테고리의 대기 채널이 WARM_POOL_SIZE개가 될 때까지 숨겨진 음성 채널을 만듭니다.
 
+        사용자의 /createvoice 요청보다 API를 적게 점유하도록 한 번에 하나씩 순서대로 만듭니다.
+        """
+        try:
+            while len(registry.pooled_channel_ids(category.id)) < WARM_POOL_SIZE:
+                channel = await category.create_voice_channel(
+                    name=POOL_CHANNEL_NAME, overwrites=pool_overwrites(category), reason="대기 채널 미리 생성")
+                registry.add_channel({
+                    'channel_id': channel.id,
+                    'guild_id': category.guild.id,
+                    'category_id': category.id,
+                    'pooled': True
+                })
+                POOL_EVENTS.inc(event='created')
+        except Exception as e:
+            print(f"'{category.name}' 카테고리의 대기 채널 생성 중 오류 발생: {e}")
+        finally:
+            self.pool_refills.pop(category.id, None)
+
+    def unpool_channel(self, channel):
+        """누군가 들어가 있는 대기 채널을 풀에서 빼고 일반 채널로 기록합니다.
+
+        서버 관리자(Administrator)는 권한 설정과 관계없이 숨겨 둔 대기 채널도 보고 들어갈 수 있습니다.
+        이런 채널은 다른 사용자에게 내주지 않고, 모두 나가면 일반 채널처럼 자동 삭제되도록 합니다.
+        """
+        print(f'대기 채널(ID: {channel.id})에 사용자가 있어 풀에서 제외합니다.')
+        registry.add_channel({'channel_id': channel.id, 'guild_id': channel.guild.id})
+
+    async def trim_pool(self, channels):
+        """더 이상 필요 없는 대기 채널들을 삭제합니다. 기록은 호출 전에 이미 제거되어 있어야 합니다."""
+        for channel in channels:
+            try:
+                await channel.delete(reason="더 이상 필요 없는 대기 채널")
+                POOL_EVENTS.inc(event='trimmed')
             except discord.NotFound:
-                # 채널이 이미 삭제된 경우, 목록에서 제거합니다.
-                channels_to_remove.append(channel_id)
+                pass
             except Exception as e:
-                print(f'채널 확인 중 오류 발생 (ID: {channel_id}): {e}')
+                print(f'대기 채널 삭제 중 오류 발생 (ID: {channel.id}): {e}')
 
-        # 삭제 대상 채널들을 JSON 파일에서 최종적으로 제거합니다.
-        if channels_to_remove:
-            current_channels = load_json(CHANNELS_FILE)
-            updated_channels = [d for d in current_channels if d.get('channel_id') not in channels_to_remove]
-            save_json(updated_channels, CHANNELS_FILE)
+    async def reveal_pooled_channel(self, category, name, limit, bitrate, overwrites):
+        """카테고리의 대기 채널 하나를 요청한 이름과 설정으로 바꿔 공개하고 반환합니다.
+
+        채널 이름, 인원 제한, 비트레이트, 권한을 한 번의 요청으로 수정합니다.
+        풀을 사용하지 않거나 대기 채널이 없으면 None을 반환하며, 이때 호출한 쪽에서 채널을 새로 만듭니다.
+        """
+        if WARM_POOL_SIZE <= 0:
+            return None
+        while True:
+            channel_id = registry.take_pooled_channel(category.id)
+            if channel_id is None:
+                POOL_EVENTS.inc(event='miss')
+                self.schedule_refill(category)
+                return None
+            channel = category.guild.get_channel(channel_id)
+            if not isinstance(channel, discord.VoiceChannel):
+                # 봇이 꺼져 있는 동안 삭제된 대기 채널입니다.
+                registry.remove_channel(channel_id)
+            elif len(channel.members) > 0:
+                # 누군가 들어가 있는 대기 채널은 다른 사용자에게 내주지 않습니다.
+                self.unpool_channel(channel)
+            else:
+                break
+        self.schedule_refill(category)
+
+        try:
+            # 역할이 지정되지 않은 경우 카테고리의 권한을 그대로 적용합니다.
+            await channel.edit(name=name, user_limit=limit, bitrate=bitrate * 1000,
+                               overwrites=overwrites if overwrites else dict(category.overwrites))
+        except Exception:
+            # 수정에 실패한 채널은 숨겨진 상태 그대로이므로 다시 풀에 넣습니다.
+            registry.release_pooled_channel(channel_id)
+            raise
+        POOL_EVENTS.inc(event='taken')
+        return channel
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        """샤드 하나가 준비되면 전체 샤드를 기다리지 않고 그 샤드의 서버부터 상태를 맞춥니다."""
+        await self.reconcile([guild for guild in self.bot.guilds if guild.shard_id == shard_id])
 
     @check_empty_channels.before_loop
     async def before_check_empty_channels(self):
@@ -241,58 +1563,95 @@ class VoiceManagement(commands.Cog):
     # --- 슬래시 명령어 ---
     @app_commands.command(name='setchannel', description='(어드민/관리자) 현재 채널을 봇 사용 가능 채널로 등록합니다.')
     @is_admin() # 어드민 또는 서버 관리자만 사용 가능
+    @instrumented
     async def setchannel(self, interaction: discord.Interaction):
-        allowed_channels = load_json(ALLOWED_CHANNELS_FILE)
-        if interaction.channel_id in allowed_channels:
+        await registry.refresh_allowed()
+        if not registry.add_allowed(interaction.channel_id, interaction.guild_id):
             await interaction.response.send_message("이미 등록된 채널입니다.", ephemeral=True)
         else:
-            allowed_channels.append(interaction.channel_id)
-            save_json(allowed_channels, ALLOWED_CHANNELS_FILE)
             await interaction.response.send_message(f"✅ **{interaction.channel.name}** 채널을 봇 사용 가능 채널로 등록했습니다.", ephemeral=True)
 
     @app_commands.command(name='unsetchannel', description='(어드민/관리자) 현재 채널을 봇 사용 가능 채널에서 제외합니다.')
     @is_admin() # 어드민 또는 서버 관리자만 사용 가능
+    @instrumented
     async def unsetchannel(self, interaction: discord.Interaction):
-        allowed_channels = load_json(ALLOWED_CHANNELS_FILE)
-        if interaction.channel_id not in allowed_channels:
+        await registry.refresh_allowed()
+        if not registry.remove_allowed(interaction.channel_id, interaction.guild_id):
             await interaction.response.send_message("등록되지 않은 채널입니다.", ephemeral=True)
         else:
-            allowed_channels.remove(interaction.channel_id)
-            save_json(allowed_channels, ALLOWED_CHANNELS_FILE)
             await interaction.response.send_message(f"🗑️ **{interaction.channel.name}** 채널을 봇 사용 가능 채널에서 제외했습니다.", ephemeral=True)
 
 
     @app_commands.command(name='listchannels', description='(어드민/관리자) 봇 사용이 허용된 모든 채널 목록을 보여줍니다.')
     @is_admin()
+    @instrumented
     async def listchannels(self, interaction: discord.Interaction):
         """봇 사용이 허용된 채널의 목록을 임베드로 보여줍니다."""
         await interaction.response.defer(ephemeral=True)
 
-        allowed_channel_ids = load_json(ALLOWED_CHANNELS_FILE)
-        
+        allowed_channel_ids = registry.allowed_channel_ids()
+
         if not allowed_channel_ids:
             await interaction.followup.send("봇 사용이 허용된 채널이 없습니다.", ephemeral=True)
             return
 
-        embed = Embed(title="✅ 봇 사용 가능 채널 목록", color=discord.Color.blue())
-        
-        description_lines = []
-        for channel_id in allowed_channel_ids:
+        description_lines = await self.resolve_channel_lines(allowed_channel_ids)
+
+        # 한 페이지에 일정 수의 채널만 표시하여 임베드 설명란 길이 제한을 넘지 않도록 합니다.
+        chunks = [description_lines[i:i + LIST_PAGE_SIZE] for i in range(0, len(description_lines), LIST_PAGE_SIZE)]
+        pages = []
+        for page_number, chunk in enumerate(chunks, start=1):
+            embed = Embed(title="✅ 봇 사용 가능 채널 목록", description="\n".join(chunk), color=discord.Color.blue())
+            if len(chunks) > 1:
+                embed.set_footer(text=f"페이지 {page_number}/{len(chunks)} · 총 {len(description_lines)}개 채널")
+            pages.append(embed)
+
+        if len(pages) == 1:
+            await interaction.followup.send(embed=pages[0], ephemeral=True)
+        else:
+            await interaction.followup.send(embed=pages[0], view=PaginatorView(pages), ephemeral=True)
+
+    async def resolve_channel_lines(self, channel_ids):
+        """채널 ID 목록을 /listchannels에 표시할 줄로 변환합니다.
+
+        봇 캐시와 최근 조회 결과를 먼저 사용하고, 나머지만 동시에 API로 조회합니다.
+        """
+        now = time.monotonic()
+        lines = {}
+        missing = []
+        for channel_id in channel_ids:
             channel = self.bot.get_channel(channel_id)
             if channel:
-                description_lines.append(f"- {channel.mention} (`{channel.name}`)")
+                lines[channel_id] = f"- {channel.mention} (`{channel.name}`)"
+                continue
+            cached = self.channel_line_cache.get(channel_id)
+            if cached and cached[0] > now:
+                lines[channel_id] = cached[1]
             else:
-                # 캐시에서 채널을 찾지 못한 경우 (예: 봇 재시작 직후)
+                missing.append(channel_id)
+
+        # 캐시에서 채널을 찾지 못한 경우 (예: 봇 재시작 직후) 동시에 조회합니다.
+        semaphore = asyncio.Semaphore(LIST_FETCH_CONCURRENCY)
+
+        async def fetch_line(channel_id):
+            async with semaphore:
                 try:
                     channel = await self.bot.fetch_channel(channel_id)
-                    description_lines.append(f"- {channel.mention} (`{channel.name}`)")
+                    line = f"- {channel.mention} (`{channel.name}`)"
                 except discord.NotFound:
-                    description_lines.append(f"- ❓ 알 수 없는 채널 (ID: `{channel_id}`)")
+                    line = f"- ❓ 알 수 없는 채널 (ID: `{channel_id}`)"
                 except discord.Forbidden:
-                    description_lines.append(f"- 🔒 접근 불가 채널 (ID: `{channel_id}`)")
+                    line = f"- 🔒 접근 불가 채널 (ID: `{channel_id}`)"
+                except discord.HTTPException:
+                    # 일시적인 오류는 기억하지 않고 다음에 다시 조회합니다.
+                    lines[channel_id] = f"- ⚠️ 조회 실패 (ID: `{channel_id}`)"
+                    return
+            self.channel_line_cache[channel_id] = (time.monotonic() + LIST_CACHE_TTL, line)
+            lines[channel_id] = line
 
-        embed.description = "\n".join(description_lines)
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        if missing:
+            await asyncio.gather(*(fetch_line(channel_id) for channel_id in missing))
+        return [lines[channel_id] for channel_id in channel_ids]
 
 
     @app_commands.command(name='createvoice', description='음성 채널을 생성하고 관리합니다.')
@@ -303,7 +1662,54 @@ class VoiceManagement(commands.Cog):
         role='채널에 접근할 수 있는 역할 (선택사항, 지정하지 않으면 카테고리 권한과 동일)'
     )
     @is_allowed_channel() # 허용된 채널에서만 사용 가능
+    @instrumented
     async def createvoice(self, interaction: discord.Interaction, name: str, limit: int, bitrate: int = 64, role: discord.Role = None):
+        # 제한을 넘은 요청은 디스코드 API나 저장소에 접근하기 전에 바로 거절합니다.
+        rejection = self.check_create_quota(interaction)
+        if rejection is not None:
+            reason, message = rejection
+            CREATE_REJECTED.inc(reason=reason)
+            set_command_status(interaction, 'rejected')
+            return await interaction.response.send_message(message, ephemeral=True)
+
+        # 생성 중인 채널도 사용자의 채널 수에 포함되도록, 처리가 끝날 때까지 기록해 둡니다.
+        key = (interaction.guild_id, interaction.user.id)
+        self.creating[key] = self.creating.get(key, 0) + 1
+        try:
+            await self.create_voice_channel(interaction, name, limit, bitrate, role)
+        finally:
+            self.creating[key] -= 1
+            if not self.creating[key]:
+                del self.creating[key]
+
+    def check_create_quota(self, interaction: discord.Interaction):
+        """사용자가 이 서버에 만든 채널 수와 사용자/서버별 요청 빈도 제한을 확인합니다.
+
+        제한을 넘었으면 (사유, 사용자에게 보여줄 메시지)를 반환하고, 넘지 않았으면 토큰을 사용한 뒤 None을 반환합니다.
+        메모리의 값만 확인하므로 디스코드 API나 저장소에 접근하지 않습니다.
+        """
+        user_id = interaction.user.id
+        active = (registry.creator_channel_count(interaction.guild_id, user_id)
+                  + self.creating.get((interaction.guild_id, user_id), 0))
+        if active >= MAX_CHANNELS_PER_CREATOR:
+            return 'channels', (f'❌ 이 서버에 이미 생성한 음성 채널이 {active}개 있습니다. (최대 {MAX_CHANNELS_PER_CREATOR}개) '
+                                '사용하지 않는 채널을 삭제한 뒤 다시 시도해주세요.')
+
+        now = time.monotonic()
+        user_wait = create_user_limiter.retry_after(user_id, now)
+        if user_wait > 0:
+            return 'user_rate', f'❌ 채널 생성 요청이 너무 잦습니다. {math.ceil(user_wait)}초 후에 다시 시도해주세요.'
+        guild_wait = create_guild_limiter.retry_after(interaction.guild_id, now)
+        if guild_wait > 0:
+            return 'guild_rate', f'❌ 이 서버에서 채널 생성 요청이 몰리고 있습니다. {math.ceil(guild_wait)}초 후에 다시 시도해주세요.'
+
+        # 두 제한을 모두 통과한 경우에만 토큰을 사용하여, 거절된 요청이 토큰을 소모하지 않도록 합니다.
+        create_user_limiter.consume(user_id, now)
+        create_guild_limiter.consume(interaction.guild_id, now)
+        return None
+
+    async def create_voice_channel(self, interaction: discord.Interaction, name: str, limit: int, bitrate: int, role: discord.Role):
+        """/createvoice의 실제 처리입니다. 카테고리에 음성 채널을 만들고 관리 메시지를 보냅니다."""
         # defer()를 사용하여 3초 이상 걸릴 수 있는 작업에 대한 타임아웃을 방지하고, 응답을 명령어 사용자에게만 표시합니다.
         await interaction.response.defer(ephemeral=True)
         
@@ -314,21 +1720,44 @@ class VoiceManagement(commands.Cog):
             if hasattr(interaction.channel, 'parent') and isinstance(interaction.channel.parent, discord.CategoryChannel):
                 category = interaction.channel.parent
             else:
+                set_command_status(interaction, 'rejected')
                 return await interaction.followup.send('❌ 이 채널은 카테고리에 속해 있지 않습니다.', ephemeral=True)
 
+        # 역할이 지정된 경우 해당 역할만 채널에 접근할 수 있도록, 생성 요청에 권한 설정을 함께 담습니다.
+        # 카테고리의 권한을 그대로 이어받은 뒤 필요한 대상만 덮어씁니다.
+        overwrites = None
+        if role:
+            overwrites = dict(category.overwrites)
+            # 기본적으로 @everyone 역할의 접근을 차단합니다.
+            overwrites[interaction.guild.default_role] = discord.PermissionOverwrite(view_channel=False, connect=False)
+            # 지정된 역할에만 채널 보기 및 연결 권한을 부여합니다.
+            overwrites[role] = discord.PermissionOverwrite(view_channel=True, connect=True)
+            # 채널 생성자에게도 권한을 부여합니다 (역할이 없어도 접근 가능하도록)
+            overwrites[interaction.user] = discord.PermissionOverwrite(view_channel=True, connect=True)
+
+        started = time.perf_counter()
+        # 같은 서버에서 요청이 몰리면 순서대로 처리되도록 대기합니다.
+        slots = self.create_slots.setdefault(interaction.guild_id, asyncio.Semaphore(CREATE_CONCURRENCY_PER_GUILD))
+        async with slots:
+            queued = time.perf_counter()
+            try:
+                # 미리 만들어 둔 대기 채널이 있으면 설정만 바꿔 공개합니다.
+                vc = await self.reveal_pooled_channel(category, name, limit, bitrate, overwrites)
+                if vc is None:
+                    # 카테고리 안에 음성 채널을 생성합니다. 비트레이트는 bps 단위이므로 1000을 곱합니다.
+                    if overwrites:
+                        vc = await category.create_voice_channel(name=name, user_limit=limit, bitrate=bitrate * 1000, overwrites=overwrites)
+                    else:
+                        vc = await category.create_voice_channel(name=name, user_limit=limit, bitrate=bitrate * 1000)
+                created = time.perf_counter()
+            except discord.Forbidden:
+                set_command_status(interaction, 'error')
+                return await interaction.followup.send(f'❌ 생성 실패: 봇이 `{category.name}` 카테고리에 채널을 생성할 권한이 없습니다.', ephemeral=True)
+            except Exception as e:
+                set_command_status(interaction, 'error')
+                return await interaction.followup.send(f'❌ 생성 실패: {e}', ephemeral=True)
+
         try:
-            # 카테고리 안에 음성 채널을 생성합니다. 비트레이트는 bps 단위이므로 1000을 곱합니다.
-            vc = await category.create_voice_channel(name=name, user_limit=limit, bitrate=bitrate * 1000)
-            
-            # 역할이 지정된 경우 해당 역할만 채널에 접근할 수 있도록 권한을 설정합니다.
-            if role:
-                # 기본적으로 @everyone 역할의 접근을 차단합니다.
-                await vc.set_permissions(interaction.guild.default_role, view_channel=False, connect=False)
-                # 지정된 역할에만 채널 보기 및 연결 권한을 부여합니다.
-                await vc.set_permissions(role, view_channel=True, connect=True)
-                # 채널 생성자에게도 권한을 부여합니다 (역할이 없어도 접근 가능하도록)
-                await vc.set_permissions(interaction.user, view_channel=True, connect=True)
-            
             # 생성 완료 임베드 메시지를 구성합니다.
             embed = Embed(title="✅ 음성 채널 생성 완료",
                             description=f"음성 채널 **{vc.mention}**이(가) 성공적으로 생성되었습니다.",
@@ -346,27 +1775,55 @@ class VoiceManagement(commands.Cog):
                 embed.add_field(name="**접근 권한**", value="카테고리와 동일", inline=True)
             
             # 채널 관리 버튼 View를 생성하고 메시지를 전송합니다.
-            view = ManagementView(voice_channel=vc, creator_id=interaction.user.id)
+            view = ManagementView(vc.id)
             message = await interaction.followup.send(embed=embed, view=view)
 
-            # 생성된 채널 정보를 JSON 파일에 저장합니다.
-            channels = load_json(CHANNELS_FILE)
-            channels.append({
+            # 생성된 채널 정보를 레지스트리에 저장합니다.
+            registry.add_channel({
                 'channel_id': vc.id,
+                'guild_id': interaction.guild_id,
+                'creator_id': interaction.user.id,
                 'message_id': message.id,
                 'message_channel_id': message.channel.id
             })
-            save_json(channels, CHANNELS_FILE)
+            # 생성 직후에는 아무도 없으므로 바로 자동 삭제를 예약합니다. 누군가 들어오면 취소됩니다.
+            self.schedule_reap(vc.id)
+            self.record_create_latency(started, queued, created, time.perf_counter())
 
-        except discord.Forbidden:
-            await interaction.followup.send(f'❌ 생성 실패: 봇이 `{category.name}` 카테고리에 채널을 생성할 권한이 없습니다.', ephemeral=True)
         except Exception as e:
+            set_command_status(interaction, 'error')
             await interaction.followup.send(f'❌ 생성 실패: {e}', ephemeral=True)
+        finally:
+            # 관리 메시지를 보내지 못했더라도 채널은 이미 만들어져 공개된 상태입니다.
+            # 대기 채널에서 꺼낸 채널이 pooled 기록으로 남거나 기록 없이 남지 않도록, 일반 채널로 기록하여 자동 삭제되게 합니다.
+            data = registry.get_channel(vc.id)
+            if data is None or data.get('pooled'):
+                registry.add_channel({
+                    'channel_id': vc.id,
+                    'guild_id': interaction.guild_id,
+                    'creator_id': interaction.user.id
+                })
+                self.schedule_reap(vc.id)
+
+    def record_create_latency(self, started, queued, created, finished):
+        """채널 생성 단계별 소요 시간을 기록하고 로그로 남깁니다."""
+        timings = {
+            'queue': queued - started,
+            'create': created - queued,
+            'message': finished - created,
+            'total': finished - started,
+        }
+        for stage, seconds in timings.items():
+            CREATE_STAGE_SECONDS.observe(seconds, stage=stage)
+        print(f"채널 생성 완료: 대기 {timings['queue']:.2f}초, 생성 {timings['create']:.2f}초, "
+              f"메시지 {timings['message']:.2f}초, 전체 {timings['total']:.2f}초")
 
 # --- 봇 실행 ---
 
 async def setup(bot):
-    """봇에 Cog를 등록합니다."""
+    """봇에 Cog와 관리 버튼을 등록합니다."""
+    # 관리 버튼은 재시작 후에도 동작하도록 custom_id 형식으로 한 번만 등록합니다.
+    bot.add_dynamic_items(DeleteChannelButton, ConfirmDeleteButton, CancelDeleteButton)
     await bot.add_cog(VoiceManagement(bot))
 
 # 이 파일이 직접 실행될 때만 아래 코드를 실행합니다.
@@ -379,15 +1836,32 @@ if __name__ == '__main__':
     
     async def main():
         """봇을 비동기적으로 실행하기 위한 메인 함수입니다."""
+        # 메트릭 엔드포인트가 설정된 경우 HTTP 서버를 시작합니다.
+        metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+        # systemctl stop/restart가 보내는 SIGTERM의 기본 동작은 프로세스를 바로 종료하므로,
+        # bot.close()를 호출하여 Cog 언로드 시 저장되지 않은 변경 사항이 기록되도록 합니다.
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, lambda: asyncio.create_task(bot.close()))
+            except NotImplementedError:
+                # Windows에서는 시그널 핸들러를 등록할 수 없습니다.
+                pass
         async with bot:
-            # 봇이 시작되기 전에 필요한 JSON 파일들을 로드(또는 생성)합니다.
-            load_json(CHANNELS_FILE)
-            load_json(ALLOWED_CHANNELS_FILE)
+            # 봇이 시작되기 전에 저장소를 한 번만 읽어 레지스트리에 올립니다. (파일이 없으면 빈 상태로 시작)
+            registry.load()
+            mark_startup('storage')
             # Cog를 설정합니다.
             await setup(bot)
+            mark_startup('setup')
             # 봇을 시작합니다.
-            await bot.start(token)
+            try:
+                await bot.start(token)
+            finally:
+                # 로그인 실패 등으로 Cog가 언로드되지 않은 경우에도 남은 변경 사항을 기록합니다.
+                await registry.flush()
+                if metrics_runner is not None:
+                    await metrics_runner.cleanup()
 
     # 비동기 main 함수를 실행합니다.
-    import asyncio
     asyncio.run(main())